@@ -1,15 +1,23 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 from datetime import datetime, timedelta
 import uuid
+import heapq
+import pandas as pd
 from utils.data_manager import (
     initialize_session_state,
     save_user_data,
     load_user_data,
+    add_task,
+    priority_label_for,
+    get_categories_by_id,
+    get_data_version,
+    get_events_df,
+    get_session_cached,
+    get_task_store,
 )
-from utils.task_classifier import classify_task, suggest_time_slot
+from utils.task_classifier import classify_task
 from utils.ui import inject_custom_css
 from assets.icons import get_icon
 import pathlib
@@ -19,11 +27,21 @@ import pathlib
 # otherwise fall back to an emoji.
 assets_dir = pathlib.Path(__file__).parent / "assets"
 preferred_icons = [assets_dir / "schedura_icon.png", assets_dir / "icon.png", assets_dir / "favicon.png"]
-found_icon = None
-for p in preferred_icons:
-    if p.exists():
-        found_icon = str(p)
-        break
+
+@st.cache_resource(show_spinner=False)
+def _find_icon():
+    """Probe the icon candidates once per process; the assets don't change at runtime."""
+    for p in preferred_icons:
+        if p.exists():
+            return str(p)
+    return None
+
+found_icon = _find_icon()
+
+@st.cache_resource(show_spinner=False)
+def _icon_bytes(path):
+    """Read the icon once; identical bytes let Streamlit reuse the stored media file."""
+    return pathlib.Path(path).read_bytes()
 
 st.set_page_config(
     page_title="AI Planner",
@@ -38,6 +56,29 @@ inject_custom_css()
 # Initialize session state
 initialize_session_state()
 
+# Onboarding form options
+PRODUCTIVITY_PEAK_OPTIONS = ("Morning", "Afternoon", "Evening", "Night")
+WORK_ROUTINE_OPTIONS = ("Strict Schedule", "Flexible with Structure", "Completely Flexible")
+BREAK_FREQUENCY_OPTIONS = ("Frequent Short Breaks", "Few Longer Breaks", "Minimal Breaks")
+GOAL_TIMEFRAME_OPTIONS = ("Daily Goals", "Weekly Goals", "Monthly Goals", "Quarterly Goals")
+HABIT_FORMATION_OPTIONS = ("Start Small", "Moderate Changes", "Challenge Myself")
+HEALTH_PRIORITY_OPTIONS = ("Sleep", "Exercise", "Nutrition", "Mindfulness", "Water Intake")
+
+# Dashboard card markup
+EVENT_CARD_TEMPLATE = (
+    "<div style='padding: 10px; border-left: 5px solid {color}; margin-bottom: 10px;'>"
+    "<div style='color: #888;'>{time}</div>"
+    "<div style='font-weight: bold;'>{title}</div>"
+    "</div>\n"
+)
+TASK_CARD_TEMPLATE = (
+    "<div style='padding: 10px; border-left: 5px solid {color}; margin-bottom: 10px;'>"
+    "<div style='font-weight: bold;'>{title}</div>"
+    "<div style='color: #888;'>Priority: {priority}</div>"
+    "</div>\n"
+)
+HABIT_CARD_TEMPLATE = "<div style='margin-bottom: 5px;'>{title} - {streak} days</div>\n"
+
 # App title and description
 def main():
     # Display welcome message for first-time users
@@ -66,17 +107,17 @@ def display_welcome():
             st.subheader("Productivity Preferences")
             productivity_peak = st.selectbox(
                 "When are you most productive?",
-                options=["Morning", "Afternoon", "Evening", "Night"]
+                options=PRODUCTIVITY_PEAK_OPTIONS
             )
             
             work_routine = st.select_slider(
                 "Work Routine Preference",
-                options=["Strict Schedule", "Flexible with Structure", "Completely Flexible"]
+                options=WORK_ROUTINE_OPTIONS
             )
             
             break_frequency = st.select_slider(
                 "Break Frequency",
-                options=["Frequent Short Breaks", "Few Longer Breaks", "Minimal Breaks"]
+                options=BREAK_FREQUENCY_OPTIONS
             )
             
         with col2:
@@ -84,17 +125,17 @@ def display_welcome():
             
             goal_timeframe = st.selectbox(
                 "Goal Planning Preference",
-                options=["Daily Goals", "Weekly Goals", "Monthly Goals", "Quarterly Goals"]
+                options=GOAL_TIMEFRAME_OPTIONS
             )
             
             habit_formation = st.select_slider(
                 "Habit Formation Approach",
-                options=["Start Small", "Moderate Changes", "Challenge Myself"]
+                options=HABIT_FORMATION_OPTIONS
             )
             
             health_priority = st.multiselect(
                 "Health Priorities",
-                options=["Sleep", "Exercise", "Nutrition", "Mindfulness", "Water Intake"],
+                options=HEALTH_PRIORITY_OPTIONS,
                 default=["Sleep", "Exercise"]
             )
         
@@ -142,64 +183,68 @@ def display_welcome():
                 st.rerun()
 
 def display_dashboard():
+    categories_by_id = get_categories_by_id()
+    profile = st.session_state.get("user_profile", {})
+    tasks = st.session_state.get("tasks", [])
+    store = get_task_store()
+    now = datetime.now()
+    today = now.date()
+    
     # Show project icon in the sidebar if available
-    sidebar_icon = found_icon or str(assets_dir / "schedura_icon.png")
-    if sidebar_icon and os.path.exists(sidebar_icon):
+    if found_icon:
         with st.sidebar:
-            st.image(sidebar_icon, width=72)
+            st.image(_icon_bytes(found_icon), width=72)
 
     # Header with greeting and date
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        user_name = st.session_state.get("user_profile", {}).get("name", "there")
+        user_name = profile.get("name", "there")
         st.title(f"Hello, {user_name}! 👋")
         
     with col2:
-        today = datetime.now()
-        st.write(f"**{today.strftime('%A, %B %d, %Y')}**")
+        st.write(f"**{now.strftime('%A, %B %d, %Y')}**")
     
     # Main dashboard content
     st.subheader("Your Day at a Glance")
     
     # Show today's schedule
-    today_events = [event for event in st.session_state.get("calendar_events", []) 
-                   if datetime.fromisoformat(event["start_time"]).date() == today.date()]
-    today_tasks = [task for task in st.session_state.get("tasks", []) 
-                  if task.get("due_date") and datetime.fromisoformat(task["due_date"]).date() == today.date()]
+    today_events = get_today_events(today)
+    today_tasks = get_today_tasks(today)
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Today's Schedule")
         if today_events:
-            for event in sorted(today_events, key=lambda x: x["start_time"]):
-                start = datetime.fromisoformat(event["start_time"])
-                category = next((c for c in st.session_state.get("categories", []) if c["id"] == event["category_id"]), None)
+            cards = []
+            for time_label, event in today_events:
+                category = categories_by_id.get(event["category_id"])
                 category_color = category["color"] if category else "#808080"
                 
-                st.markdown(f"""
-                <div style='padding: 10px; border-left: 5px solid {category_color}; margin-bottom: 10px;'>
-                    <div style='color: #888;'>{start.strftime('%I:%M %p')}</div>
-                    <div style='font-weight: bold;'>{event["title"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                cards.append(EVENT_CARD_TEMPLATE.format(
+                    color=category_color,
+                    time=time_label,
+                    title=event["title"],
+                ))
+            st.markdown("".join(cards), unsafe_allow_html=True)
         else:
             st.info("No events scheduled for today.")
             
     with col2:
         st.markdown("### Today's Tasks")
         if today_tasks:
-            for task in sorted(today_tasks, key=lambda x: x.get("importance", 0) * x.get("urgency", 0), reverse=True):
-                category = next((c for c in st.session_state.get("categories", []) if c["id"] == task["category_id"]), None)
+            cards = []
+            for task in today_tasks:
+                category = categories_by_id.get(task["category_id"])
                 category_color = category["color"] if category else "#808080"
                 
-                st.markdown(f"""
-                <div style='padding: 10px; border-left: 5px solid {category_color}; margin-bottom: 10px;'>
-                    <div style='font-weight: bold;'>{task["title"]}</div>
-                    <div style='color: #888;'>Priority: {calculate_priority_label(task)}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                cards.append(TASK_CARD_TEMPLATE.format(
+                    color=category_color,
+                    title=task["title"],
+                    priority=calculate_priority_label(task),
+                ))
+            st.markdown("".join(cards), unsafe_allow_html=True)
         else:
             st.info("No tasks due today.")
     
@@ -209,43 +254,17 @@ def display_dashboard():
     
     with col1:
         st.markdown("### Quick Add")
-        with st.form(key="quick_add_form"):
-            task_title = st.text_input("Add a task", placeholder="Enter task title")
-            add_task = st.form_submit_button("Add Task")
-            
-            if add_task and task_title:
-                new_task = {
-                    "id": str(uuid.uuid4()),
-                    "title": task_title,
-                    "description": "",
-                    "category_id": st.session_state["categories"][0]["id"], # Default to first category
-                    "created_at": datetime.now().isoformat(),
-                    "due_date": None,
-                    "completed": False,
-                    "importance": 3,  # Medium importance by default
-                    "urgency": 3,     # Medium urgency by default
-                }
-                
-                # Use AI to classify task
-                category_suggestion = classify_task(task_title, st.session_state["categories"])
-                if category_suggestion:
-                    new_task["category_id"] = category_suggestion
-                
-                st.session_state["tasks"].append(new_task)
-                save_user_data()
-                st.success(f"Added task: {task_title}")
-                st.rerun()
+        quick_add_fragment()
     
     with col2:
         st.markdown("### Progress")
         
         # Calculate task completion rate
-        all_tasks = st.session_state.get("tasks", [])
-        completed_tasks = sum(1 for task in all_tasks if task.get("completed", False))
-        total_tasks = len(all_tasks)
+        completed_tasks = store.completed_count
+        total_tasks = len(store)
         
         if total_tasks > 0:
-            completion_rate = completed_tasks / total_tasks
+            completion_rate = store.completion_rate()
             st.progress(completion_rate)
             st.write(f"Task Completion: {int(completion_rate * 100)}% ({completed_tasks}/{total_tasks})")
         else:
@@ -262,12 +281,13 @@ def display_dashboard():
         
         habits = st.session_state.get("habits", [])
         if habits:
-            for habit in sorted(habits, key=lambda x: x.get("current_streak", 0), reverse=True)[:3]:
-                st.markdown(f"""
-                <div style='margin-bottom: 5px;'>
-                    {habit["title"]} - {habit.get("current_streak", 0)} days
-                </div>
-                """, unsafe_allow_html=True)
+            cards = []
+            for habit in heapq.nlargest(3, habits, key=lambda x: x.get("current_streak", 0)):
+                cards.append(HABIT_CARD_TEMPLATE.format(
+                    title=habit["title"],
+                    streak=habit.get("current_streak", 0),
+                ))
+            st.markdown("".join(cards), unsafe_allow_html=True)
         else:
             st.info("No habits tracked yet. Add some in the Health & Habits section.")
     
@@ -280,29 +300,21 @@ def display_dashboard():
     with col1:
         st.markdown("### Suggested Focus")
         
-        # Get incomplete tasks
-        incomplete_tasks = [task for task in st.session_state.get("tasks", []) 
-                           if not task.get("completed", False)]
+        # Top 3 incomplete tasks by importance * urgency
+        top_rows = store.top_n_priority(3, ~store.completed)
         
-        if incomplete_tasks:
-            # Sort by importance * urgency
-            prioritized_tasks = sorted(
-                incomplete_tasks, 
-                key=lambda x: (x.get("importance", 1) * x.get("urgency", 1)), 
-                reverse=True
-            )
-            
-            # Take top 3 tasks
-            for task in prioritized_tasks[:3]:
-                category = next((c for c in st.session_state.get("categories", []) if c["id"] == task["category_id"]), None)
+        if len(top_rows):
+            cards = []
+            for task in (tasks[i] for i in top_rows):
+                category = categories_by_id.get(task["category_id"])
                 category_color = category["color"] if category else "#808080"
                 
-                st.markdown(f"""
-                <div style='padding: 10px; border-left: 5px solid {category_color}; margin-bottom: 10px;'>
-                    <div style='font-weight: bold;'>{task["title"]}</div>
-                    <div style='color: #888;'>Priority: {calculate_priority_label(task)}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                cards.append(TASK_CARD_TEMPLATE.format(
+                    color=category_color,
+                    title=task["title"],
+                    priority=calculate_priority_label(task),
+                ))
+            st.markdown("".join(cards), unsafe_allow_html=True)
         else:
             st.info("No tasks to focus on. Add some tasks to get AI suggestions.")
     
@@ -310,7 +322,7 @@ def display_dashboard():
         st.markdown("### Optimal Schedule")
         
         # Get user's productivity peak
-        productivity_peak = st.session_state.get("user_profile", {}).get("productivity_peak", "Morning")
+        productivity_peak = profile.get("productivity_peak", "Morning")
         
         if productivity_peak == "Morning":
             st.write("Based on your preferences, schedule high-priority tasks in the morning when your energy is highest.")
@@ -322,7 +334,7 @@ def display_dashboard():
             st.write("Based on your preferences, schedule high-priority tasks at night when your energy is highest.")
         
         # Get break frequency
-        break_frequency = st.session_state.get("user_profile", {}).get("break_frequency", "Frequent Short Breaks")
+        break_frequency = profile.get("break_frequency", "Frequent Short Breaks")
         
         if break_frequency == "Frequent Short Breaks":
             st.write("Suggestion: Use the Pomodoro technique - 25 minutes of work followed by 5-minute breaks.")
@@ -331,20 +343,73 @@ def display_dashboard():
         else:
             st.write("Suggestion: Set aside 2-3 hours of focused work time with minimal interruptions.")
 
-def calculate_priority_label(task):
-    importance = task.get("importance", 1)
-    urgency = task.get("urgency", 1)
+def get_today_events(today):
+    """Return today's events as (time label, event) pairs sorted by start time.
     
-    score = importance * urgency
+    Kept in session state until the date rolls over or the events change.
+    """
+    return get_session_cached(
+        "_today_events",
+        (today.toordinal(), get_data_version("calendar_events")),
+        lambda: _build_today_events(today)
+    )
+
+def _build_today_events(today):
+    # Start times come pre-parsed as naive wall-clock times, so events with and
+    # without a UTC offset can be matched to today together
+    events = st.session_state.get("calendar_events", [])
+    events_df = get_events_df()
+    today_starts = events_df.loc[events_df["start_dt"].dt.normalize() == pd.Timestamp(today), "start_dt"]
+    # Order by the ISO string as before; format the time labels once per cache fill rather than on every render
+    return [
+        (today_starts[i].strftime('%I:%M %p'), events[i])
+        for i in sorted(today_starts.index, key=lambda i: events[i]["start_time"])
+    ]
+
+def get_today_tasks(today):
+    """Return the tasks due today, highest priority first.
     
-    if score >= 20:
-        return "Critical"
-    elif score >= 12:
-        return "High"
-    elif score >= 6:
-        return "Medium"
-    else:
-        return "Low"
+    Kept in session state until the date rolls over or the tasks change.
+    """
+    return get_session_cached(
+        "_today_tasks",
+        (today.toordinal(), get_data_version("tasks")),
+        lambda: _build_today_tasks(today)
+    )
+
+def _build_today_tasks(today):
+    store = get_task_store()
+    all_tasks = st.session_state.get("tasks", [])
+    return [all_tasks[i] for i in store.rows_by_priority(store.today_mask(today))]
+
+def _carry_today_tasks(new_task):
+    """Keep the cached today list valid after adding a task that isn't due today"""
+    cached = st.session_state.get("_today_tasks")
+    if cached is None or new_task.get("due_date"):
+        return
+    (ordinal, _), today_tasks = cached
+    st.session_state["_today_tasks"] = ((ordinal, get_data_version("tasks")), today_tasks)
+
+@st.fragment
+def quick_add_fragment():
+    """Quick Add form; submitting it only reruns this fragment until a task is added"""
+    with st.form(key="quick_add_form"):
+        task_title = st.text_input("Add a task", placeholder="Enter task title")
+        submitted = st.form_submit_button("Add Task")
+        
+        if submitted and task_title:
+            # Use AI to classify task; add_task falls back to the first category
+            category_suggestion = classify_task(task_title, st.session_state.get("categories", []))
+            
+            # Medium importance and urgency by default
+            new_task = add_task(task_title, category_id=category_suggestion)
+            _carry_today_tasks(new_task)
+            st.success(f"Added task: {task_title}")
+            # Rerun the whole app so the progress and focus sections pick up the new task
+            st.rerun()
+
+def calculate_priority_label(task):
+    return priority_label_for(task.get("importance", 1) * task.get("urgency", 1))
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,8 @@
+from functools import lru_cache
+
+
+# Icons are pure functions of (name, color, size), so each combination is built once
+@lru_cache(maxsize=256)
 def get_icon(name, color="#FFFFFF", size=24):
     """
     Returns an SVG icon as a string for use in streamlit markdown.
@@ -4,6 +4,13 @@ from datetime import datetime, timedelta
 import uuid
 from utils.data_manager import (
     initialize_session_state,
+    get_categories_by_id,
+    get_category_ids_by_name,
+    get_category_index_by_id,
+    get_data_version,
+    get_session_cached,
+    get_tasks_df,
+    get_task_due_dates,
     save_user_data,
     load_user_data,
     add_task,
@@ -12,8 +19,8 @@ from utils.data_manager import (
     complete_task
 )
 from utils.task_classifier import (
-    classify_task,
-    estimate_task_parameters,
+    cached_classify_task,
+    cached_estimate_task_parameters,
     get_next_tasks
 )
 from utils.visualization import (
@@ -36,6 +43,39 @@ st.set_page_config(
 
 inject_custom_css()
 
+RECOMMENDATION_CARD_TEMPLATE = (
+    "<div style='padding: 10px; border-left: 5px solid {color}; margin-bottom: 10px;'>"
+    "<div style='font-weight: bold;'>{rank}. {title}</div>"
+    "<div style='color: #888;'>Importance: {importance}/5, Urgency: {urgency}/5</div>"
+    "{due_block}"
+    "</div>\n"
+)
+DUE_BLOCK_TEMPLATE = "<div>Due: {}</div>"
+
+# Half-open (low, high) priority score range for each priority filter option
+PRIORITY_RANGES = {
+    "Critical": (20, float("inf")),
+    "High": (12, 20),
+    "Medium": (6, 12),
+    "Low": (float("-inf"), 6)
+}
+
+# Session state keys holding the task being edited
+EDIT_KEYS = (
+    "edit_task_id",
+    "edit_task_title",
+    "edit_task_description",
+    "edit_task_category",
+    "edit_task_due_date",
+    "edit_task_importance",
+    "edit_task_urgency"
+)
+
+def clear_edit_state():
+    """Leave edit mode by dropping the edit keys from session state"""
+    for key in EDIT_KEYS:
+        st.session_state.pop(key, None)
+
 st.title("Task Management")
 
 # Sidebar filters
@@ -44,6 +84,8 @@ with st.sidebar:
     
     # Category filter
     categories = st.session_state.get("categories", [])
+    categories_by_id = get_categories_by_id()
+    category_ids_by_name = get_category_ids_by_name()
     category_options = ["All Categories"] + [c["name"] for c in categories]
     
     selected_category = st.selectbox(
@@ -87,134 +129,126 @@ tab1, tab2, tab3 = st.tabs(["Task List", "Add New Task", "Task Matrix"])
 
 # Task List tab
 with tab1:
-    # Get and filter tasks
-    tasks = st.session_state.get("tasks", [])
+    # Get and filter tasks with one vectorized pass over the cached task frame
+    all_tasks = st.session_state.get("tasks", [])
+    df = get_tasks_df()
+    mask = pd.Series(True, index=df.index)
     
     # Apply filters
     if selected_category != "All Categories":
-        category_id = next((c["id"] for c in categories if c["name"] == selected_category), None)
+        category_id = category_ids_by_name.get(selected_category)
         if category_id:
-            tasks = [task for task in tasks if task.get("category_id") == category_id]
+            mask &= df["category_id"].eq(category_id)
     
     if selected_status != "All Tasks":
         is_completed = selected_status == "Completed"
-        tasks = [task for task in tasks if task.get("completed", False) == is_completed]
+        mask &= df["completed"].eq(is_completed)
     
-    if selected_priority != "All Priorities":
-        if selected_priority == "Critical":
-            tasks = [task for task in tasks if (task.get("importance", 1) * task.get("urgency", 1)) >= 20]
-        elif selected_priority == "High":
-            tasks = [task for task in tasks if 12 <= (task.get("importance", 1) * task.get("urgency", 1)) < 20]
-        elif selected_priority == "Medium":
-            tasks = [task for task in tasks if 6 <= (task.get("importance", 1) * task.get("urgency", 1)) < 12]
-        elif selected_priority == "Low":
-            tasks = [task for task in tasks if (task.get("importance", 1) * task.get("urgency", 1)) < 6]
+    if selected_priority in PRIORITY_RANGES:
+        low, high = PRIORITY_RANGES[selected_priority]
+        mask &= df["score"].between(low, high, inclusive="left")
     
-    if selected_date_option == "Today":
-        today = datetime.now().date()
-        tasks = [task for task in tasks if task.get("due_date") and datetime.fromisoformat(task["due_date"]).date() == today]
-    elif selected_date_option == "Next 7 Days":
-        today = datetime.now().date()
-        end_date = today + timedelta(days=7)
-        tasks = [task for task in tasks if task.get("due_date") and 
-                 today <= datetime.fromisoformat(task["due_date"]).date() <= end_date]
-    elif selected_date_option == "This Month":
-        today = datetime.now().date()
-        tasks = [task for task in tasks if task.get("due_date") and 
-                 datetime.fromisoformat(task["due_date"]).date().month == today.month and
-                 datetime.fromisoformat(task["due_date"]).date().year == today.year]
-    elif selected_date_option == "Custom Range" and custom_date_range:
-        start_date, end_date = custom_date_range
-        tasks = [task for task in tasks if task.get("due_date") and 
-                 start_date <= datetime.fromisoformat(task["due_date"]).date() <= end_date]
+    if selected_date_option != "All Time":
+        # Read the clock and normalize the due dates once for whichever date filter is active
+        today = pd.Timestamp(datetime.now().date())
+        due_dates = df["due_date"].dt.normalize()
+        
+        if selected_date_option == "Today":
+            mask &= due_dates.eq(today)
+        elif selected_date_option == "Next 7 Days":
+            mask &= due_dates.between(today, today + pd.Timedelta(days=7))
+        elif selected_date_option == "This Month":
+            month_start = today.replace(day=1)
+            mask &= due_dates.between(month_start, month_start + pd.offsets.MonthBegin(1), inclusive="left")
+        elif selected_date_option == "Custom Range" and custom_date_range:
+            start_date, end_date = custom_date_range
+            mask &= due_dates.between(pd.Timestamp(start_date), pd.Timestamp(end_date))
+    
+    filtered = df[mask]
     
     # Show filtered tasks
-    if tasks:
-        # Sort by priority (importance * urgency)
-        sorted_tasks = sorted(
-            tasks, 
-            key=lambda x: (
-                (not x.get("completed", False)),  # Incomplete tasks first
-                x.get("due_date") is not None,  # Tasks with due date first
-                x.get("due_date", "9999-12-31"),  # Sort by due date
-                x.get("importance", 0) * x.get("urgency", 0)  # Then by priority
-            ),
-            reverse=True
+    if not filtered.empty:
+        # Incomplete tasks first, then tasks with a due date (latest first), then by priority
+        ordered = filtered.assign(has_due=filtered["due_date"].notna()).sort_values(
+            ["completed", "has_due", "due_date", "score"],
+            ascending=[True, False, False, False],
+            kind="stable"
         )
+        sorted_tasks = [all_tasks[i] for i in ordered.index]
+        due_dates_by_id = get_task_due_dates()
         
-        for task in sorted_tasks:
-            with st.container():
-                col1, col2, col3 = st.columns([0.1, 0.7, 0.2])
-                
-                with col1:
-                    # Checkbox for completion
-                    completed = task.get("completed", False)
-                    new_status = st.checkbox("", value=completed, key=f"task_{task['id']}")
-                    
-                    # Update completion status if changed
-                    if new_status != completed:
-                        if new_status:
-                            complete_task(task["id"])
-                        else:
-                            update_task(task["id"], completed=False, completed_at=None)
-                        st.rerun()
-                
-                with col2:
-                    # Task details
-                    category = next((c for c in categories if c["id"] == task.get("category_id")), None)
-                    category_color = category["color"] if category else "#808080"
-                    category_name = category["name"] if category else "Uncategorized"
-                    
-                    # Calculate priority label
-                    importance = task.get("importance", 1)
-                    urgency = task.get("urgency", 1)
-                    priority_score = importance * urgency
-                    
-                    if priority_score >= 20:
-                        priority_label = "Critical"
-                    elif priority_score >= 12:
-                        priority_label = "High"
-                    elif priority_score >= 6:
-                        priority_label = "Medium"
-                    else:
-                        priority_label = "Low"
-                    
-                    # Style based on completion status
-                    title_style = "text-decoration: line-through;" if completed else ""
-                    
-                    st.html(f"""
-                    <div style='padding-left: 5px; border-left: 5px solid {category_color};'>
-                        <span style='font-weight: bold; {title_style}'>{task['title']}</span>
-                        <div style='display: flex; gap: 10px; margin-top: 5px;'>
-                            <span style='font-size: 0.8em; color: #888;'>{category_name}</span>
-                            <span style='font-size: 0.8em; color: #888;'>Priority: {priority_label}</span>
-                            {f"<span style='font-size: 0.8em; color: #888;'>Due: {datetime.fromisoformat(task['due_date']).strftime('%Y-%m-%d')}</span>" if task.get('due_date') else ""}
-                        </div>
-                        {f"<div style='margin-top: 5px; font-size: 0.9em;'>{task['description']}</div>" if task.get('description') else ""}
-                    </div>
-                    """)
-                
-                with col3:
-                    # Actions
-                    col3_1, col3_2 = st.columns(2)
-                    
-                    with col3_1:
-                        if st.button("Edit", key=f"edit_{task['id']}"):
-                            st.session_state["edit_task_id"] = task["id"]
-                            st.session_state["edit_task_title"] = task["title"]
-                            st.session_state["edit_task_description"] = task.get("description", "")
-                            st.session_state["edit_task_category"] = task.get("category_id", "")
-                            st.session_state["edit_task_due_date"] = datetime.fromisoformat(task["due_date"]).date() if task.get("due_date") else None
-                            st.session_state["edit_task_importance"] = task.get("importance", 3)
-                            st.session_state["edit_task_urgency"] = task.get("urgency", 3)
-                            st.rerun()
-                    
-                    with col3_2:
-                        if st.button("Delete", key=f"delete_{task['id']}"):
-                            delete_task(task["id"])
-                            st.rerun()
-            
-            st.markdown("---")
+        tasks_by_id = {task["id"]: task for task in sorted_tasks}
+        
+        # One editable grid instead of a widget row per task; only "Done" is editable
+        grid = pd.DataFrame(
+            {
+                "Done": [task.get("completed", False) for task in sorted_tasks],
+                "Task": [task["title"] for task in sorted_tasks],
+                "Category": [
+                    categories_by_id[task["category_id"]]["name"] if task.get("category_id") in categories_by_id else "Uncategorized"
+                    for task in sorted_tasks
+                ],
+                "Priority": [task["priority_label"] for task in sorted_tasks],
+                "Due": [
+                    due_dates_by_id[task["id"]][1] if task["id"] in due_dates_by_id else ""
+                    for task in sorted_tasks
+                ],
+                "Description": [task.get("description", "") for task in sorted_tasks]
+            },
+            index=list(tasks_by_id)
+        )
+        
+        # Grid edits are stored by row position, so start a fresh widget whenever the tasks change
+        edited = st.data_editor(
+            grid,
+            key=f"task_grid_{get_data_version('tasks')}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Task", "Category", "Priority", "Due", "Description"],
+            column_config={
+                "Done": st.column_config.CheckboxColumn("Done", width="small"),
+                "Description": st.column_config.TextColumn("Description", width="large")
+            }
+        )
+        
+        # Update completion status for the rows whose checkbox changed
+        changed = edited.index[edited["Done"] != grid["Done"]]
+        for changed_id in changed:
+            if edited.at[changed_id, "Done"]:
+                complete_task(changed_id)
+            else:
+                update_task(changed_id, completed=False, completed_at=None)
+        if len(changed):
+            st.rerun()
+        
+        # Actions for a single selected task
+        col1, col2, col3 = st.columns([0.6, 0.2, 0.2], vertical_alignment="bottom")
+        
+        with col1:
+            selected_id = st.selectbox(
+                "Selected task",
+                options=list(tasks_by_id),
+                format_func=lambda x: tasks_by_id[x]["title"]
+            )
+        
+        task = tasks_by_id[selected_id]
+        
+        with col2:
+            if st.button("Edit", key="edit_selected_task", use_container_width=True):
+                due = due_dates_by_id.get(task["id"])
+                st.session_state["edit_task_id"] = task["id"]
+                st.session_state["edit_task_title"] = task["title"]
+                st.session_state["edit_task_description"] = task.get("description", "")
+                st.session_state["edit_task_category"] = task.get("category_id", "")
+                st.session_state["edit_task_due_date"] = due[0] if due else None
+                st.session_state["edit_task_importance"] = task.get("importance", 3)
+                st.session_state["edit_task_urgency"] = task.get("urgency", 3)
+                st.rerun()
+        
+        with col3:
+            if st.button("Delete", key="delete_selected_task", use_container_width=True):
+                delete_task(task["id"])
+                st.rerun()
     else:
         st.info("No tasks found matching your filters.")
 
@@ -244,10 +278,8 @@ with tab2:
             category_id = st.selectbox(
                 "Category",
                 options=[c["id"] for c in categories],
-                format_func=lambda x: next((c["name"] for c in categories if c["id"] == x), ""),
-                index=0 if not st.session_state.get("edit_task_category") else 
-                    [i for i, c in enumerate(categories) if c["id"] == st.session_state.get("edit_task_category")][0]
-                    if any(c["id"] == st.session_state.get("edit_task_category") for c in categories) else 0
+                format_func=lambda x: categories_by_id[x]["name"] if x in categories_by_id else "",
+                index=get_category_index_by_id().get(st.session_state.get("edit_task_category"), 0)
             )
             
             due_date = st.date_input(
@@ -274,15 +306,15 @@ with tab2:
         
         # AI suggestion for category if it's a new task
         if not task_id and title:
-            suggested_category_id = classify_task(title, categories, st.session_state.get("tasks", []))
+            suggested_category_id = cached_classify_task(title, categories, st.session_state.get("tasks", []))
             if suggested_category_id:
-                suggested_category = next((c["name"] for c in categories if c["id"] == suggested_category_id), None)
+                suggested_category = categories_by_id[suggested_category_id]["name"] if suggested_category_id in categories_by_id else None
                 if suggested_category:
                     st.info(f"AI suggests categorizing this as: {suggested_category}")
         
         # AI suggestion for importance and urgency if it's a new task
         if not task_id and title:
-            suggested_importance, suggested_urgency = estimate_task_parameters(title, description)
+            suggested_importance, suggested_urgency = cached_estimate_task_parameters(title, description)
             if suggested_importance != 3 or suggested_urgency != 3:
                 st.info(f"AI suggests importance: {suggested_importance}/5, urgency: {suggested_urgency}/5")
         
@@ -308,11 +340,7 @@ with tab2:
                     )
                     
                     # Clear edit state
-                    for key in ["edit_task_id", "edit_task_title", "edit_task_description", 
-                               "edit_task_category", "edit_task_due_date", 
-                               "edit_task_importance", "edit_task_urgency"]:
-                        if key in st.session_state:
-                            del st.session_state[key]
+                    clear_edit_state()
                     
                     st.success("Task updated successfully!")
                 else:
@@ -335,11 +363,7 @@ with tab2:
     if task_id:
         if st.button("Cancel Editing"):
             # Clear edit state
-            for key in ["edit_task_id", "edit_task_title", "edit_task_description", 
-                       "edit_task_category", "edit_task_due_date", 
-                       "edit_task_importance", "edit_task_urgency"]:
-                if key in st.session_state:
-                    del st.session_state[key]
+            clear_edit_state()
             
             st.rerun()
 
@@ -348,12 +372,23 @@ with tab3:
     st.subheader("Priority Matrix (Eisenhower Matrix)")
     st.write("Visualize your tasks based on importance and urgency to focus on what matters most.")
     
+    # Every tab runs on each rerun, so the matrix data and charts are only rebuilt after the tasks change
+    tasks_version = get_data_version("tasks")
+    
     # Filter for incomplete tasks
-    incomplete_tasks = [task for task in st.session_state.get("tasks", []) if not task.get("completed", False)]
+    incomplete_tasks = get_session_cached(
+        "_incomplete_tasks",
+        tasks_version,
+        lambda: [task for task in st.session_state.get("tasks", []) if not task.get("completed", False)]
+    )
     
     if incomplete_tasks:
         # Generate the priority matrix chart
-        matrix_chart = priority_matrix_chart(incomplete_tasks)
+        matrix_chart = get_session_cached(
+            "_task_matrix_chart",
+            tasks_version,
+            lambda: priority_matrix_chart(incomplete_tasks)
+        )
         
         if matrix_chart:
             st.plotly_chart(matrix_chart, use_container_width=True)
@@ -365,7 +400,11 @@ with tab3:
     # Additional visualization: Task completion by category
     st.subheader("Task Completion by Category")
     
-    completion_chart = task_completion_by_category(st.session_state.get("tasks", []), categories)
+    completion_chart = get_session_cached(
+        "_task_completion_chart",
+        (tasks_version, get_data_version("categories")),
+        lambda: task_completion_by_category(st.session_state.get("tasks", []), categories)
+    )
     
     if completion_chart:
         st.plotly_chart(completion_chart, use_container_width=True)
@@ -376,25 +415,25 @@ with tab3:
     st.subheader("AI Task Recommendations")
     
     if incomplete_tasks:
-        next_tasks = get_next_tasks(incomplete_tasks)
+        next_tasks = get_session_cached("_next_tasks", tasks_version, lambda: get_next_tasks(incomplete_tasks))
         
         if next_tasks:
             st.write("Based on your priorities, focus on these tasks next:")
             
+            due_dates_by_id = get_task_due_dates()
+            cards = []
             for i, task in enumerate(next_tasks, 1):
-                category = next((c for c in categories if c["id"] == task.get("category_id")), None)
-                category_color = category["color"] if category else "#808080"
-                
-                st.markdown(f"""
-                <div style='padding: 10px; border-left: 5px solid {category_color}; margin-bottom: 10px;'>
-                    <div style='font-weight: bold;'>{i}. {task['title']}</div>
-                    <div style='color: #888;'>
-                        Importance: {task.get('importance', 3)}/5, 
-                        Urgency: {task.get('urgency', 3)}/5
-                    </div>
-                    {f"<div>Due: {datetime.fromisoformat(task['due_date']).strftime('%Y-%m-%d')}</div>" if task.get('due_date') else ""}
-                </div>
-                """, unsafe_allow_html=True)
+                category = categories_by_id.get(task.get("category_id"))
+                due = due_dates_by_id.get(task["id"])
+                cards.append(RECOMMENDATION_CARD_TEMPLATE.format_map({
+                    "color": category["color"] if category else "#808080",
+                    "rank": i,
+                    "title": task["title"],
+                    "importance": task.get("importance", 3),
+                    "urgency": task.get("urgency", 3),
+                    "due_block": DUE_BLOCK_TEMPLATE.format(due[1]) if due else ""
+                }))
+            st.markdown("".join(cards), unsafe_allow_html=True)
         else:
             st.info("No task recommendations available.")
     else:
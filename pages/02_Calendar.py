@@ -1,20 +1,28 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import json
 import uuid
 import calendar
+from collections import defaultdict
 from utils.data_manager import (
+    EVENT_EDIT_KEYS,
     initialize_session_state,
+    get_categories_by_id,
+    get_category_index_by_id,
+    get_data_version,
+    get_events_df,
+    get_session_cached,
     save_user_data,
     add_calendar_event,
+    add_calendar_events_bulk,
     update_calendar_event,
     delete_calendar_event,
     update_task
 )
 from utils.calendar_integration import (
-    generate_month_view,
-    generate_week_view,
-    generate_day_view,
+    month_weeks,
     import_ics_calendar,
     export_to_ics_calendar,
     get_google_auth_url,
@@ -22,7 +30,7 @@ from utils.calendar_integration import (
     sync_events_from_google
 )
 from utils.task_classifier import suggest_time_slot
-from utils.ui import inject_custom_css
+from utils.ui import inject_custom_css, load_html_template
 from assets.icons import get_icon
 
 # Initialize session state
@@ -38,6 +46,62 @@ st.set_page_config(
 
 inject_custom_css()
 
+WEEK_CELL_STYLE = "border: 1px solid #ddd; padding: 4px; vertical-align: top; height: 60px;"
+TODAY_STYLE = "background-color: #e6f7ff; font-weight: bold;"
+
+# Pixel height of the Month view frame: the weekday header plus one row per week
+MONTH_HEADER_HEIGHT = 40
+MONTH_ROW_HEIGHT = 112
+
+WEEK_EVENT_TEMPLATE = (
+    "<div style='margin-bottom: 2px; padding: 2px; background-color: {color}20; border-left: 3px solid {color}; "
+    "font-size: 0.8em; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;'>"
+    "<div>{time}</div>"
+    "<div>{title}</div>"
+    "</div>"
+)
+DAY_EVENT_TEMPLATE = (
+    "<div style='margin-bottom: 10px; padding: 8px; background-color: {color}20; border-left: 5px solid {color};'>"
+    "<div style='font-weight: bold;'>{title}</div>"
+    "<div style='font-size: 0.9em;'>{time}</div>"
+    "<div style='font-size: 0.8em; color: #888;'>{category}</div>"
+    "{description_block}"
+    "{location_block}"
+    "</div>"
+)
+DESCRIPTION_BLOCK_TEMPLATE = "<div style='margin-top: 5px;'>{}</div>"
+LOCATION_BLOCK_TEMPLATE = "<div style='font-size: 0.9em;'><b>Location:</b> {}</div>"
+
+# Upcoming events rendered per Agenda page
+AGENDA_PAGE_SIZE = 25
+
+# The shown date lives in session state and is mirrored to the URL, so a refresh keeps the same period
+if "calendar_date" not in st.session_state:
+    try:
+        st.session_state["calendar_date"] = date.fromisoformat(st.query_params.get("date", ""))
+    except ValueError:
+        st.session_state["calendar_date"] = date.today()
+
+def set_calendar_date(new_date):
+    """Show new_date in the calendar and keep it in the page URL"""
+    st.session_state["calendar_date"] = new_date
+    st.query_params["date"] = new_date.isoformat()
+
+def step_calendar_date(view, step):
+    """Move the shown date one month, week or day forward (step=1) or back (step=-1)"""
+    selected_date = st.session_state["calendar_date"]
+    if view == "Month":
+        month_index = selected_date.year * 12 + selected_date.month - 1 + step
+        set_calendar_date(date(month_index // 12, month_index % 12 + 1, 1))
+    elif view == "Week":
+        set_calendar_date(selected_date + timedelta(days=7 * step))
+    else:
+        set_calendar_date(selected_date + timedelta(days=step))
+
+def set_agenda_page(page):
+    """Show the given page of upcoming events"""
+    st.session_state["agenda_page"] = page
+
 st.title("Calendar")
 
 # Sidebar filters and actions
@@ -48,53 +112,6 @@ with st.sidebar:
     view_options = ["Month", "Week", "Day", "Agenda"]
     selected_view = st.radio("View", options=view_options)
     
-    # Date picker
-    today = datetime.now().date()
-    selected_date = st.date_input("Select Date", value=today)
-    
-    # Quick navigation
-    st.write("---")
-    st.subheader("Quick Navigation")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("Today"):
-            selected_date = today
-            st.rerun()
-    
-    with col2:
-        if st.button("Previous"):
-            if selected_view == "Month":
-                # Previous month
-                if selected_date.month == 1:
-                    selected_date = selected_date.replace(year=selected_date.year - 1, month=12, day=1)
-                else:
-                    selected_date = selected_date.replace(month=selected_date.month - 1, day=1)
-            elif selected_view == "Week":
-                # Previous week
-                selected_date = selected_date - timedelta(days=7)
-            else:
-                # Previous day
-                selected_date = selected_date - timedelta(days=1)
-            st.rerun()
-    
-    with col3:
-        if st.button("Next"):
-            if selected_view == "Month":
-                # Next month
-                if selected_date.month == 12:
-                    selected_date = selected_date.replace(year=selected_date.year + 1, month=1, day=1)
-                else:
-                    selected_date = selected_date.replace(month=selected_date.month + 1, day=1)
-            elif selected_view == "Week":
-                # Next week
-                selected_date = selected_date + timedelta(days=7)
-            else:
-                # Next day
-                selected_date = selected_date + timedelta(days=1)
-            st.rerun()
-    
     # Calendar integrations
     st.write("---")
     st.subheader("Import/Export")
@@ -120,20 +137,15 @@ with st.sidebar:
         if imported_events:
             st.success(f"Successfully imported {len(imported_events)} events.")
             
-            # Add imported events to session state
+            # Add imported events to session state in one save, skipping IDs that already exist
+            existing_ids = {e.get("id") for e in st.session_state.get("calendar_events", [])}
+            new_events = []
             for event in imported_events:
                 if "id" in event and "title" in event and "start_time" in event and "end_time" in event:
-                    # Check if event already exists
-                    existing_events = st.session_state.get("calendar_events", [])
-                    if not any(e.get("id") == event["id"] for e in existing_events):
-                        add_calendar_event(
-                            title=event["title"],
-                            start_time=event["start_time"],
-                            end_time=event["end_time"],
-                            description=event.get("description", ""),
-                            location=event.get("location", ""),
-                            category_id=event.get("category_id")
-                        )
+                    if event["id"] not in existing_ids:
+                        existing_ids.add(event["id"])
+                        new_events.append(event)
+            add_calendar_events_bulk(new_events)
             
             st.rerun()
         else:
@@ -151,27 +163,35 @@ with st.sidebar:
             # Sync events
             access_token = st.session_state["google_calendar_token"].get("access_token")
             if access_token:
-                synced_events = sync_events_from_google(access_token)
+                # Only fetch what changed since the last sync; an expired token needs a full sync
+                sync_token = st.session_state.get("google_sync_token")
+                synced_events, next_sync_token, deleted_ids = sync_events_from_google(access_token, sync_token=sync_token)
+                if sync_token and next_sync_token is None:
+                    synced_events, next_sync_token, deleted_ids = sync_events_from_google(access_token)
                 
-                if synced_events:
-                    st.success(f"Synced {len(synced_events)} events from Google Calendar.")
+                if next_sync_token:
+                    st.session_state["google_sync_token"] = next_sync_token
+                
+                if synced_events or deleted_ids:
+                    st.success(f"Synced {len(synced_events or [])} events from Google Calendar.")
+                    
+                    # Remove events deleted on Google's side
+                    for event_id in deleted_ids:
+                        delete_calendar_event(event_id)
                     
-                    # Add synced events to session state
-                    for event in synced_events:
+                    # Add synced events to session state in one save, skipping IDs that already exist
+                    existing_ids = {e.get("id") for e in st.session_state.get("calendar_events", [])}
+                    new_events = []
+                    for event in synced_events or []:
                         if "id" in event and "title" in event and "start_time" in event and "end_time" in event:
-                            # Check if event already exists
-                            existing_events = st.session_state.get("calendar_events", [])
-                            if not any(e.get("id") == event["id"] for e in existing_events):
-                                add_calendar_event(
-                                    title=event["title"],
-                                    start_time=event["start_time"],
-                                    end_time=event["end_time"],
-                                    description=event.get("description", ""),
-                                    location=event.get("location", ""),
-                                    category_id=event.get("category_id")
-                                )
+                            if event["id"] not in existing_ids:
+                                existing_ids.add(event["id"])
+                                new_events.append(event)
+                    add_calendar_events_bulk(new_events)
                     
                     st.rerun()
+                elif next_sync_token:
+                    st.info("Google Calendar is already up to date.")
                 else:
                     st.error("Failed to sync events or no events found.")
         
@@ -179,6 +199,7 @@ with st.sidebar:
             # Remove token
             if "google_calendar_token" in st.session_state:
                 del st.session_state["google_calendar_token"]
+            st.session_state.pop("google_sync_token", None)
             st.success("Disconnected from Google Calendar.")
             st.rerun()
     else:
@@ -202,98 +223,102 @@ with st.sidebar:
                     st.error("Failed to authenticate with Google. Please try again.")
 
 # Main content
-tab1, tab2 = st.tabs(["View Calendar", "Add Event"])
-
-# View Calendar tab
-with tab1:
+# View Calendar tab. As a fragment, date navigation and paging rerun only this block, not the whole page.
+@st.fragment
+def render_calendar_view(selected_view):
+    # Read the clock on every (fragment) rerun so every view and cache key agrees on "now"
+    now = datetime.now()
+    today = now.date()
+    now_hour = now.hour
+    
+    # Date navigation
+    date_col, today_col, prev_col, next_col = st.columns([0.4, 0.2, 0.2, 0.2])
+    
+    with date_col:
+        selected_date = st.date_input(
+            "Select Date",
+            key="calendar_date",
+            on_change=lambda: set_calendar_date(st.session_state["calendar_date"])
+        )
+    
+    with today_col:
+        st.button("Today", on_click=set_calendar_date, args=(today,))
+    
+    with prev_col:
+        st.button("Previous", on_click=step_calendar_date, args=(selected_view, -1))
+    
+    with next_col:
+        st.button("Next", on_click=step_calendar_date, args=(selected_view, 1))
+    
     # Get all calendar events
     all_events = st.session_state.get("calendar_events", [])
     
+    # View data is reused across reruns until the events change or a different period is shown
+    events_version = get_data_version("calendar_events")
+    categories_by_id = get_categories_by_id()
+    categories_version = get_data_version("categories")
+    
     # Month View
     if selected_view == "Month":
         st.subheader(f"{calendar.month_name[selected_date.month]} {selected_date.year}")
         
-        # Generate month view data
-        month_data = generate_month_view(selected_date.year, selected_date.month, all_events)
-        
-        # Create a table for the month view
-        month_table = "<table style='width: 100%; border-collapse: collapse;'>"
-        
-        # Add weekday headers
-        month_table += "<tr>"
-        for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
-            month_table += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>{day}</th>"
-        month_table += "</tr>"
-        
-        # Add weeks
-        for week in month_data["weeks"]:
-            month_table += "<tr>"
+        # Day numbers for each week of the month, 0 outside it
+        month_grid = month_weeks(selected_date.year, selected_date.month)
+        
+        # The browser draws the table from assets/month_view.html; only this JSON payload is built here,
+        # and it is reused until the events, categories or today's date change
+        def build_month_payload():
+            # Bucket the month's events by the day they start on; events without a valid start aren't shown
+            events_df = get_events_df()
+            start_labels = events_df["start_label"].to_numpy()
+            in_month = (events_df["start_dt"].dt.year == selected_date.year) & (events_df["start_dt"].dt.month == selected_date.month)
+            rows_by_day = defaultdict(list)
+            for i, day in zip(events_df.index[in_month], events_df["start_dt"].dt.day[in_month]):
+                rows_by_day[day].append(i)
             
-            for day_data in week:
-                day = day_data["day"]
-                events = day_data["events"]
-                
-                # Set cell style
-                cell_style = "border: 1px solid #ddd; vertical-align: top; height: 100px; padding: 5px;"
-                
-                # Add cell for the day
-                if day is None:
-                    # Empty cell
-                    month_table += f"<td style='{cell_style} background-color: #f9f9f9;'></td>"
-                else:
-                    # Check if this day is today
-                    today_style = ""
-                    if today.year == selected_date.year and today.month == selected_date.month and today.day == day:
-                        today_style = "background-color: #e6f7ff; font-weight: bold;"
-                    
-                    month_table += f"<td style='{cell_style} {today_style}'>"
-                    
-                    # Add day number
-                    month_table += f"<div style='text-align: right;'>{day}</div>"
+            weeks = []
+            for week in month_grid:
+                cells = []
+                for day in week:
+                    # Days outside the month are drawn as empty cells
+                    if day == 0:
+                        cells.append(None)
+                        continue
                     
                     # Add events for this day (limited to top 3 for space)
+                    rows = rows_by_day.get(day, ())
                     max_visible_events = 3
-                    visible_events = events[:max_visible_events]
-                    
-                    for event in visible_events:
+                    visible_events = []
+                    for i in rows[:max_visible_events]:
+                        event = all_events[i]
+                        
                         # Get category color
-                        category_id = event.get("category_id")
-                        category = next((c for c in st.session_state.get("categories", []) if c["id"] == category_id), None)
+                        category = categories_by_id.get(event.get("category_id"))
                         category_color = category["color"] if category else "#808080"
                         
-                        # Format time
-                        try:
-                            start_time = datetime.fromisoformat(event["start_time"]).strftime("%H:%M")
-                        except (ValueError, TypeError):
-                            start_time = "All day"
-                        
-                        month_table += f"""
-                        <div style='
-                            margin-top: 2px;
-                            padding: 2px;
-                            background-color: {category_color}20;
-                            border-left: 3px solid {category_color};
-                            font-size: 0.8em;
-                            white-space: nowrap;
-                            overflow: hidden;
-                            text-overflow: ellipsis;
-                        '>
-                            <span>{start_time}</span> {event["title"]}
-                        </div>
-                        """
-                    
-                    # Show count of additional events
-                    if len(events) > max_visible_events:
-                        additional_count = len(events) - max_visible_events
-                        month_table += f"<div style='text-align: right; font-size: 0.8em; color: #888;'>+{additional_count} more</div>"
+                        visible_events.append({"time": start_labels[i], "title": event["title"], "color": category_color})
                     
-                    month_table += "</td>"
+                    cells.append({
+                        "day": day,
+                        "today": today.year == selected_date.year and today.month == selected_date.month and today.day == day,
+                        "events": visible_events,
+                        "more": max(0, len(rows) - max_visible_events)
+                    })
+                weeks.append(cells)
             
-            month_table += "</tr>"
+            # Keep event text from closing the template's <script> tag
+            return json.dumps({"weeks": weeks}).replace("</", "<\\/")
         
-        month_table += "</table>"
-        
-        st.markdown(month_table, unsafe_allow_html=True)
+        month_payload = get_session_cached(
+            "_calendar_month_payload",
+            (selected_date.year, selected_date.month, events_version, categories_version, today),
+            build_month_payload
+        )
+        components.html(
+            load_html_template("month_view.html").replace("__PAYLOAD__", month_payload),
+            height=MONTH_HEADER_HEIGHT + MONTH_ROW_HEIGHT * len(month_grid),
+            scrolling=False
+        )
     
     # Week View
     elif selected_view == "Week":
@@ -302,224 +327,207 @@ with tab1:
         
         st.subheader(f"Week {week_num}, {year}")
         
-        # Generate week view data
-        week_data = generate_week_view(year, week_num, all_events)
-        
-        # Create a table for the week view
-        week_table = "<table style='width: 100%; border-collapse: collapse;'>"
+        # The seven days (Monday first) of the selected date's week
+        week_start = selected_date - timedelta(days=selected_date.weekday())
+        week_days = [week_start + timedelta(days=i) for i in range(7)]
         
-        # Add header row with dates
-        week_table += "<tr><th style='width: 10%; border: 1px solid #ddd; padding: 8px;'>Time</th>"
-        
-        for day_data in week_data["days"]:
-            day = day_data["date"]
-            day_name = day.strftime("%a")
-            day_date = day.strftime("%d")
-            
-            # Check if this day is today
-            today_style = ""
-            if day == today:
-                today_style = "background-color: #e6f7ff; font-weight: bold;"
+        # The finished HTML is reused until the events, categories or highlighted day/hour change
+        def build_week_html():
+            # Build the table as a list of fragments and join once at the end
+            parts = ["<table style='width: 100%; border-collapse: collapse;'>"]
             
-            week_table += f"<th style='border: 1px solid #ddd; padding: 8px; {today_style}'>{day_name} {day_date}</th>"
-        
-        week_table += "</tr>"
-        
-        # Add time slots
-        for hour in range(7, 22):  # 7 AM to 9 PM
-            week_table += f"<tr><td style='border: 1px solid #ddd; padding: 8px;'>{hour}:00</td>"
+            # Add header row with dates
+            parts.append("<tr><th style='width: 10%; border: 1px solid #ddd; padding: 8px;'>Time</th>")
             
-            for day_data in week_data["days"]:
-                day = day_data["date"]
-                events = day_data["events"]
+            for day in week_days:
+                day_name = day.strftime("%a")
+                day_date = day.strftime("%d")
                 
-                # Filter events for this hour
-                hour_events = []
-                for event in events:
-                    try:
-                        start_time = datetime.fromisoformat(event["start_time"])
-                        end_time = datetime.fromisoformat(event["end_time"])
-                        
-                        # Check if event is active during this hour
-                        hour_start = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
-                        hour_end = hour_start + timedelta(hours=1)
-                        
-                        if (hour_start <= start_time < hour_end) or \
-                           (start_time <= hour_start and end_time > hour_start):
-                            hour_events.append(event)
-                    except (ValueError, TypeError):
-                        continue
+                # Check if this day is today
+                today_style = ""
+                if day == today:
+                    today_style = TODAY_STYLE
                 
-                # Cell styling
-                cell_style = "border: 1px solid #ddd; padding: 4px; vertical-align: top; height: 60px;"
-                
-                # Check if this day and hour is current
-                current_style = ""
-                if day == today and hour == datetime.now().hour:
-                    current_style = "background-color: #e6f7ff;"
-                
-                week_table += f"<td style='{cell_style} {current_style}'>"
+                parts.append(f"<th style='border: 1px solid #ddd; padding: 8px; {today_style}'>{day_name} {day_date}</th>")
+            
+            parts.append("</tr>")
+            
+            # Bucket the week's events by (date, hour) once, so each cell is a dict lookup.
+            # An event fills its start hour and every later hour of its start day that begins before it ends;
+            # all-day events (no valid end time) are never placed in an hour slot.
+            events_df = get_events_df()
+            start_labels = events_df["start_label"].to_numpy()
+            end_labels = events_df["end_label"].to_numpy()
+            start_days = events_df["start_dt"].dt.normalize()
+            in_week = start_days.isin(pd.to_datetime(week_days))
+            in_week &= ~events_df["all_day"]
+            
+            hour_buckets = defaultdict(list)
+            for i, start, end, day in zip(
+                events_df.index[in_week],
+                events_df["start_dt"][in_week],
+                events_df["end_dt"][in_week],
+                start_days[in_week]
+            ):
+                last_hour = max(start.hour, (end - day - pd.Timedelta(microseconds=1)) // pd.Timedelta(hours=1))
+                for hour in range(max(7, start.hour), min(21, last_hour) + 1):
+                    hour_buckets[(day.date(), hour)].append(i)
+            
+            # Add time slots
+            for hour in range(7, 22):  # 7 AM to 9 PM
+                parts.append(f"<tr><td style='border: 1px solid #ddd; padding: 8px;'>{hour}:00</td>")
                 
-                # Add events for this hour
-                for event in hour_events:
-                    # Get category color
-                    category_id = event.get("category_id")
-                    category = next((c for c in st.session_state.get("categories", []) if c["id"] == category_id), None)
-                    category_color = category["color"] if category else "#808080"
+                for day in week_days:
+                    # Events for this hour
+                    hour_rows = hour_buckets.get((day, hour), ())
                     
-                    # Format time
-                    try:
-                        start_time = datetime.fromisoformat(event["start_time"]).strftime("%H:%M")
-                        end_time = datetime.fromisoformat(event["end_time"]).strftime("%H:%M")
-                        time_str = f"{start_time}-{end_time}"
-                    except (ValueError, TypeError):
-                        time_str = "All day"
+                    # Check if this day and hour is current
+                    current_style = ""
+                    if day == today and hour == now_hour:
+                        current_style = "background-color: #e6f7ff;"
                     
-                    week_table += f"""
-                    <div style='
-                        margin-bottom: 2px;
-                        padding: 2px;
-                        background-color: {category_color}20;
-                        border-left: 3px solid {category_color};
-                        font-size: 0.8em;
-                        white-space: nowrap;
-                        overflow: hidden;
-                        text-overflow: ellipsis;
-                    '>
-                        <div>{time_str}</div>
-                        <div>{event["title"]}</div>
-                    </div>
-                    """
+                    parts.append(f"<td style='{WEEK_CELL_STYLE} {current_style}'>")
+                    
+                    # Add events for this hour
+                    for i in hour_rows:
+                        event = all_events[i]
+                        
+                        # Get category color
+                        category_id = event.get("category_id")
+                        category = categories_by_id.get(category_id)
+                        category_color = category["color"] if category else "#808080"
+                        
+                        # Format time; all-day events never reach an hour slot
+                        time_str = f"{start_labels[i]}-{end_labels[i]}"
+                        
+                        parts.append(WEEK_EVENT_TEMPLATE.format(
+                            color=category_color,
+                            time=time_str,
+                            title=event["title"]
+                        ))
+                    
+                    parts.append("</td>")
                 
-                week_table += "</td>"
+                parts.append("</tr>")
             
-            week_table += "</tr>"
-        
-        week_table += "</table>"
+            parts.append("</table>")
+            
+            return "".join(parts)
         
-        st.markdown(week_table, unsafe_allow_html=True)
+        week_html = get_session_cached(
+            "_calendar_week_html",
+            (year, week_num, events_version, categories_version, today, now_hour),
+            build_week_html
+        )
+        st.markdown(week_html, unsafe_allow_html=True)
     
     # Day View
     elif selected_view == "Day":
         st.subheader(f"{selected_date.strftime('%A, %B %d, %Y')}")
         
-        # Generate day view data
-        day_data = generate_day_view(selected_date, all_events)
-        
-        # Create a table for the day view
-        day_table = "<table style='width: 100%; border-collapse: collapse;'>"
-        
-        # Add header
-        day_table += "<tr><th style='width: 10%; border: 1px solid #ddd; padding: 8px;'>Time</th><th style='border: 1px solid #ddd; padding: 8px;'>Events</th></tr>"
-        
-        # Add time slots
-        for hour_data in day_data["hours"]:
-            hour = hour_data["hour"]
-            events = hour_data["events"]
+        # The finished HTML is reused until the events, categories or highlighted day/hour change
+        def build_day_html():
+            # Build the table as a list of fragments and join once at the end
+            parts = ["<table style='width: 100%; border-collapse: collapse;'>"]
             
-            # Only show hours from 6 AM to 10 PM
-            if 6 <= hour <= 22:
+            # Add header
+            parts.append("<tr><th style='width: 10%; border: 1px solid #ddd; padding: 8px;'>Time</th><th style='border: 1px solid #ddd; padding: 8px;'>Events</th></tr>")
+            
+            # All-day events (no valid start or end time) aren't placed in any hour
+            events_df = get_events_df()
+            start_labels = events_df["start_label"].to_numpy()
+            end_labels = events_df["end_label"].to_numpy()
+            timed = events_df[~events_df["all_day"]]
+            starts = timed["start_dt"]
+            ends = timed["end_dt"]
+            day_start = pd.Timestamp(selected_date)
+            
+            # Add time slots from 6 AM to 10 PM
+            for hour in range(6, 23):
+                # Events that start in this hour or are still running when it begins
+                hour_start = day_start + pd.Timedelta(hours=hour)
+                hour_end = hour_start + pd.Timedelta(hours=1)
+                hour_rows = timed.index[((starts >= hour_start) & (starts < hour_end)) | ((starts <= hour_start) & (ends > hour_start))]
+                
                 # Format the hour
                 hour_str = f"{hour}:00"
                 
                 # Check if this is the current hour
                 current_hour = ""
-                if selected_date == today and hour == datetime.now().hour:
+                if selected_date == today and hour == now_hour:
                     current_hour = "background-color: #e6f7ff;"
                 
-                day_table += f"<tr><td style='border: 1px solid #ddd; padding: 8px; {current_hour}'>{hour_str}</td>"
+                parts.append(f"<tr><td style='border: 1px solid #ddd; padding: 8px; {current_hour}'>{hour_str}</td>")
                 
                 # Add events for this hour
-                day_table += f"<td style='border: 1px solid #ddd; padding: 8px; {current_hour}'>"
+                parts.append(f"<td style='border: 1px solid #ddd; padding: 8px; {current_hour}'>")
                 
-                for event in events:
+                for i in hour_rows:
+                    event = all_events[i]
+                    
                     # Get category color
                     category_id = event.get("category_id")
-                    category = next((c for c in st.session_state.get("categories", []) if c["id"] == category_id), None)
+                    category = categories_by_id.get(category_id)
                     category_color = category["color"] if category else "#808080"
                     category_name = category["name"] if category else "Uncategorized"
                     
-                    # Format time
-                    try:
-                        start_time = datetime.fromisoformat(event["start_time"]).strftime("%H:%M")
-                        end_time = datetime.fromisoformat(event["end_time"]).strftime("%H:%M")
-                        time_str = f"{start_time} - {end_time}"
-                    except (ValueError, TypeError):
-                        time_str = "All day"
-                    
-                    day_table += f"""
-                    <div style='
-                        margin-bottom: 10px;
-                        padding: 8px;
-                        background-color: {category_color}20;
-                        border-left: 5px solid {category_color};
-                    '>
-                        <div style='font-weight: bold;'>{event["title"]}</div>
-                        <div style='font-size: 0.9em;'>{time_str}</div>
-                        <div style='font-size: 0.8em; color: #888;'>{category_name}</div>
-                        {f"<div style='margin-top: 5px;'>{event['description']}</div>" if event.get('description') else ""}
-                        {f"<div style='font-size: 0.9em;'><b>Location:</b> {event['location']}</div>" if event.get('location') else ""}
-                    </div>
-                    """
+                    parts.append(DAY_EVENT_TEMPLATE.format(
+                        color=category_color,
+                        title=event["title"],
+                        time=f"{start_labels[i]} - {end_labels[i]}",
+                        category=category_name,
+                        description_block=DESCRIPTION_BLOCK_TEMPLATE.format(event["description"]) if event.get("description") else "",
+                        location_block=LOCATION_BLOCK_TEMPLATE.format(event["location"]) if event.get("location") else ""
+                    ))
                 
-                if not events:
-                    day_table += "<em style='color: #888;'>No events</em>"
+                if hour_rows.empty:
+                    parts.append("<em style='color: #888;'>No events</em>")
                 
-                day_table += "</td></tr>"
-        
-        day_table += "</table>"
+                parts.append("</td></tr>")
+            
+            parts.append("</table>")
+            
+            return "".join(parts)
         
-        st.markdown(day_table, unsafe_allow_html=True)
+        day_html = get_session_cached(
+            "_calendar_day_html",
+            (selected_date, events_version, categories_version, today, now_hour),
+            build_day_html
+        )
+        st.markdown(day_html, unsafe_allow_html=True)
     
     # Agenda View
     else:  # Agenda View
         st.subheader("Upcoming Events")
         
         # Filter future events
-        now = datetime.now()
-        future_events = []
-        
-        for event in all_events:
-            try:
-                start_time = datetime.fromisoformat(event["start_time"])
-                if start_time >= now:
-                    future_events.append(event)
-            except (ValueError, TypeError):
-                continue
+        events_df = get_events_df()
+        future = events_df[events_df["start_dt"] >= pd.Timestamp(now)]
         
         # Sort by start time
-        future_events.sort(key=lambda x: x["start_time"])
+        future = future.sort_values("start_dt", kind="stable")
         
-        # Group by date
-        date_grouped_events = {}
-        for event in future_events:
-            start_time = datetime.fromisoformat(event["start_time"])
-            date_str = start_time.strftime("%Y-%m-%d")
-            
-            if date_str not in date_grouped_events:
-                date_grouped_events[date_str] = []
-            
-            date_grouped_events[date_str].append(event)
+        # Only render one page of events; the page is clamped in case events were removed
+        page_count = max(1, -(-len(future) // AGENDA_PAGE_SIZE))
+        agenda_page = min(st.session_state.setdefault("agenda_page", 0), page_count - 1)
+        page_start = agenda_page * AGENDA_PAGE_SIZE
+        shown = future.iloc[page_start:page_start + AGENDA_PAGE_SIZE]
         
-        # Display events by date
-        for date_str, events in date_grouped_events.items():
-            event_date = datetime.strptime(date_str, "%Y-%m-%d")
+        # Display events grouped by date
+        for event_date, group in shown.groupby(shown["start_dt"].dt.date, sort=True):
             st.write(f"#### {event_date.strftime('%A, %B %d, %Y')}")
             
-            for event in events:
+            for i, start_label, end_label, all_day in zip(group.index, group["start_label"], group["end_label"], group["all_day"]):
+                event = all_events[i]
+                
                 # Get category color
                 category_id = event.get("category_id")
-                category = next((c for c in st.session_state.get("categories", []) if c["id"] == category_id), None)
+                category = categories_by_id.get(category_id)
                 category_color = category["color"] if category else "#808080"
                 category_name = category["name"] if category else "Uncategorized"
                 
                 # Format time
-                try:
-                    start_time = datetime.fromisoformat(event["start_time"]).strftime("%H:%M")
-                    end_time = datetime.fromisoformat(event["end_time"]).strftime("%H:%M")
-                    time_str = f"{start_time} - {end_time}"
-                except (ValueError, TypeError):
-                    time_str = "All day"
+                time_str = "All day" if all_day else f"{start_label} - {end_label}"
                 
                 with st.container():
                     col1, col2 = st.columns([0.2, 0.8])
@@ -572,12 +580,28 @@ with tab1:
                 
                 st.write("---")
         
-        if not future_events:
+        if future.empty:
             st.info("No upcoming events.")
+        elif page_count > 1:
+            prev_col, info_col, next_col = st.columns([0.2, 0.6, 0.2])
+            
+            with prev_col:
+                st.button("Previous page", disabled=agenda_page == 0, on_click=set_agenda_page, args=(agenda_page - 1,))
+            
+            with info_col:
+                st.write(f"Showing {page_start + 1}-{page_start + len(shown)} of {len(future)} events")
+            
+            with next_col:
+                st.button("Next page", disabled=agenda_page == page_count - 1, on_click=set_agenda_page, args=(agenda_page + 1,))
+
+tab1, tab2 = st.tabs(["View Calendar", "Add Event"])
+
+with tab1:
+    render_calendar_view(selected_view)
 
 # Add Event tab
 with tab2:
-    event_id = st.session_state.get("edit_event_id")
+    event_id = st.session_state["edit_event_id"]
     
     if event_id:
         st.subheader("Edit Event")
@@ -592,17 +616,17 @@ with tab2:
     with st.form(key="event_form"):
         title = st.text_input(
             "Event Title",
-            value=st.session_state.get("edit_event_title", "")
+            value=st.session_state["edit_event_title"]
         )
         
         description = st.text_area(
             "Description",
-            value=st.session_state.get("edit_event_description", "")
+            value=st.session_state["edit_event_description"]
         )
         
         location = st.text_input(
             "Location",
-            value=st.session_state.get("edit_event_location", "")
+            value=st.session_state["edit_event_location"]
         )
         
         # Date and time selection
@@ -611,27 +635,27 @@ with tab2:
         with col1:
             event_date = st.date_input(
                 "Date",
-                value=st.session_state.get("edit_event_date", selected_date)
+                value=st.session_state["edit_event_date"] or st.session_state["calendar_date"]
             )
         
         with col2:
-            default_start = st.session_state.get("edit_event_start_time", datetime.now().replace(hour=9, minute=0).time())
+            default_start = st.session_state["edit_event_start_time"] or datetime.now().replace(hour=9, minute=0).time()
             start_time = st.time_input("Start Time", value=default_start)
         
         with col3:
-            default_end = st.session_state.get("edit_event_end_time", 
-                                             (datetime.combine(datetime.today(), default_start) + timedelta(hours=1)).time())
+            default_end = st.session_state["edit_event_end_time"] or (
+                datetime.combine(datetime.today(), default_start) + timedelta(hours=1)
+            ).time()
             end_time = st.time_input("End Time", value=default_end)
         
         # Category selection
         categories = st.session_state.get("categories", [])
+        categories_by_id = get_categories_by_id()
         category_id = st.selectbox(
             "Category",
             options=[c["id"] for c in categories],
-            format_func=lambda x: next((c["name"] for c in categories if c["id"] == x), ""),
-            index=0 if not st.session_state.get("edit_event_category") else 
-                [i for i, c in enumerate(categories) if c["id"] == st.session_state.get("edit_event_category")][0]
-                if any(c["id"] == st.session_state.get("edit_event_category") for c in categories) else 0
+            format_func=lambda x: categories_by_id[x]["name"] if x in categories_by_id else "",
+            index=get_category_index_by_id().get(st.session_state["edit_event_category"], 0)
         )
         
         # Option to create event from a task
@@ -705,11 +729,8 @@ with tab2:
                     )
                     
                     # Clear edit state
-                    for key in ["edit_event_id", "edit_event_title", "edit_event_description", 
-                               "edit_event_location", "edit_event_category", 
-                               "edit_event_date", "edit_event_start_time", "edit_event_end_time"]:
-                        if key in st.session_state:
-                            del st.session_state[key]
+                    for key in EVENT_EDIT_KEYS:
+                        st.session_state[key] = ""
                     
                     st.success("Event updated successfully!")
                 else:
@@ -738,10 +759,7 @@ with tab2:
     if event_id:
         if st.button("Cancel Editing"):
             # Clear edit state
-            for key in ["edit_event_id", "edit_event_title", "edit_event_description", 
-                       "edit_event_location", "edit_event_category", 
-                       "edit_event_date", "edit_event_start_time", "edit_event_end_time"]:
-                if key in st.session_state:
-                    del st.session_state[key]
+            for key in EVENT_EDIT_KEYS:
+                st.session_state[key] = ""
             
             st.rerun()
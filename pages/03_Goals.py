@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import uuid
 from utils.data_manager import (
     initialize_session_state,
+    get_categories_by_id,
+    get_category_ids_by_name,
+    get_category_index_by_id,
+    get_data_version,
+    get_goals_df,
+    get_session_cached,
     save_user_data,
     add_goal,
     update_goal,
@@ -27,6 +34,20 @@ st.set_page_config(
 
 inject_custom_css()
 
+GOAL_CARD_TEMPLATE = (
+    "<div style='padding-left: 5px; border-left: 5px solid {color};'>"
+    "<span style='font-weight: bold; font-size: 1.2em; {title_style}'>{title}</span>"
+    "<div style='display: flex; gap: 10px; margin-top: 5px;'>"
+    "<span style='font-size: 0.8em; color: #888;'>{category}</span>"
+    "{target_block}"
+    "<span style='font-size: 0.8em; color: #888;'>Progress: {progress}%</span>"
+    "</div>"
+    "{description_block}"
+    "</div>"
+)
+TARGET_BLOCK_TEMPLATE = "<span style='font-size: 0.8em; color: #888;'>Target: {}</span>"
+GOAL_DESCRIPTION_BLOCK_TEMPLATE = "<div style='margin-top: 5px; font-size: 0.9em;'>{}</div>"
+
 st.title("Goal Tracking")
 st.write("Set and track your long-term goals, break them down into milestones, and monitor your progress.")
 
@@ -36,6 +57,7 @@ with st.sidebar:
     
     # Category filter
     categories = st.session_state.get("categories", [])
+    categories_by_id = get_categories_by_id()
     category_options = ["All Categories"] + [c["name"] for c in categories]
     
     selected_category = st.selectbox(
@@ -61,22 +83,36 @@ with st.sidebar:
     )
 
 # Main content
-tab1, tab2, tab3 = st.tabs(["Active Goals", "Add New Goal", "Goal Analytics"])
-
-# Active Goals tab
-with tab1:
-    # Get and filter goals
-    goals = st.session_state.get("goals", [])
+# Active Goals tab. As a fragment, its own widget events rerun only this block; anything that changes
+# a goal still reruns the whole page so the sort order, form and analytics stay current.
+@st.fragment
+def render_active_goals(selected_category, selected_status, selected_timeframe):
+    # Get goals in display order: incomplete first, then by target date (undated last), then by progress
+    # (highest first). Filtering keeps this order, so the sort only runs when the goals change.
+    all_goals = st.session_state.get("goals", [])
+    goals_version = get_data_version("goals")
+    display_order = get_session_cached(
+        "_goal_display_order",
+        goals_version,
+        lambda: get_goals_df().sort_values(
+            ["completed", "target_date", "progress"],
+            ascending=[True, True, False],
+            na_position="last",
+            kind="stable"
+        ).index.tolist()
+    )
+    
+    # Combine the filters into one mask over the goals frame, then walk the display order once
+    goals_df = get_goals_df()
+    keep = np.ones(len(goals_df), dtype=bool)
     
-    # Apply filters
     if selected_category != "All Categories":
-        category_id = next((c["id"] for c in categories if c["name"] == selected_category), None)
+        category_id = get_category_ids_by_name().get(selected_category)
         if category_id:
-            goals = [goal for goal in goals if goal.get("category_id") == category_id]
+            keep &= (goals_df["category_id"] == category_id).to_numpy()
     
     if selected_status != "All Goals":
-        is_completed = selected_status == "Completed"
-        goals = [goal for goal in goals if goal.get("completed", False) == is_completed]
+        keep &= (goals_df["completed"] == (selected_status == "Completed")).to_numpy()
     
     if selected_timeframe != "All Time":
         today = datetime.now().date()
@@ -98,51 +134,48 @@ with tab1:
             start_date = datetime(today.year, 1, 1).date()
             end_date = datetime(today.year + 1, 1, 1).date() - timedelta(days=1)
         
-        goals = [
-            goal for goal in goals if goal.get("target_date") and 
-            start_date <= datetime.fromisoformat(goal["target_date"]).date() <= end_date
-        ]
+        # Goals without a valid target date are left out
+        target_days = goals_df["target_dt"].dt.normalize()
+        keep &= ((target_days >= pd.Timestamp(start_date)) & (target_days <= pd.Timestamp(end_date))).to_numpy()
+    
+    rows = [i for i in display_order if keep[i]]
+    
+    # Card markup for every goal (title, category, target date, progress and description),
+    # formatted only after the goals or categories change; row i is the card for all_goals[i]
+    def build_goal_cards():
+        target_labels = goals_df["target_dt"].dt.strftime("%Y-%m-%d")
+        cards = []
+        for goal, target_label in zip(all_goals, target_labels):
+            category = categories_by_id.get(goal.get("category_id"))
+            
+            cards.append(GOAL_CARD_TEMPLATE.format(
+                color=category["color"] if category else "#808080",
+                title_style="text-decoration: line-through;" if goal.get("completed", False) else "",
+                title=goal["title"],
+                category=category["name"] if category else "Uncategorized",
+                target_block=TARGET_BLOCK_TEMPLATE.format(target_label) if not pd.isna(target_label) else "",
+                progress=goal.get("progress", 0),
+                description_block=GOAL_DESCRIPTION_BLOCK_TEMPLATE.format(goal["description"]) if goal.get("description") else ""
+            ))
+        return cards
+    
+    goal_cards = get_session_cached("_goal_cards", (goals_version, get_data_version("categories")), build_goal_cards)
     
     # Display goals
-    if goals:
-        # Sort by target date and then progress
-        sorted_goals = sorted(
-            goals, 
-            key=lambda x: (
-                x.get("completed", False),  # Incomplete goals first
-                x.get("target_date", "9999-12-31"),  # Then by target date
-                -x.get("progress", 0)  # Then by progress (highest first)
-            )
-        )
-        
-        for goal in sorted_goals:
+    if rows:
+        for row in rows:
+            goal = all_goals[row]
+            
             with st.container():
                 # Check if goal is completed
                 completed = goal.get("completed", False)
                 
-                # Get category info
-                category = next((c for c in categories if c["id"] == goal.get("category_id")), None)
-                category_color = category["color"] if category else "#808080"
-                category_name = category["name"] if category else "Uncategorized"
-                
                 # Goal container
                 col1, col2 = st.columns([0.7, 0.3])
                 
                 with col1:
                     # Title and description
-                    title_style = "text-decoration: line-through;" if completed else ""
-                    
-                    st.html(f"""
-                    <div style='padding-left: 5px; border-left: 5px solid {category_color};'>
-                        <span style='font-weight: bold; font-size: 1.2em; {title_style}'>{goal['title']}</span>
-                        <div style='display: flex; gap: 10px; margin-top: 5px;'>
-                            <span style='font-size: 0.8em; color: #888;'>{category_name}</span>
-                            {f"<span style='font-size: 0.8em; color: #888;'>Target: {datetime.fromisoformat(goal['target_date']).strftime('%Y-%m-%d')}</span>" if goal.get('target_date') else ""}
-                            <span style='font-size: 0.8em; color: #888;'>Progress: {goal.get('progress', 0)}%</span>
-                        </div>
-                        {f"<div style='margin-top: 5px; font-size: 0.9em;'>{goal['description']}</div>" if goal.get('description') else ""}
-                    </div>
-                    """)
+                    st.html(goal_cards[row])
                     
                     # Milestones
                     if goal.get("milestones"):
@@ -204,7 +237,8 @@ with tab1:
                             st.session_state["edit_goal_title"] = goal["title"]
                             st.session_state["edit_goal_description"] = goal.get("description", "")
                             st.session_state["edit_goal_category"] = goal.get("category_id", "")
-                            st.session_state["edit_goal_target_date"] = datetime.fromisoformat(goal["target_date"]).date() if goal.get("target_date") else None
+                            target_dt = goals_df.at[row, "target_dt"]
+                            st.session_state["edit_goal_target_date"] = None if pd.isna(target_dt) else target_dt.date()
                             st.session_state["edit_goal_milestones"] = [m.copy() for m in goal.get("milestones", [])]
                             st.rerun()
                     
@@ -219,6 +253,11 @@ with tab1:
     else:
         st.info("No goals found matching your filters. Add some goals to get started!")
 
+tab1, tab2, tab3 = st.tabs(["Active Goals", "Add New Goal", "Goal Analytics"])
+
+with tab1:
+    render_active_goals(selected_category, selected_status, selected_timeframe)
+
 # Add New Goal tab
 with tab2:
     goal_id = st.session_state.get("edit_goal_id")
@@ -245,10 +284,8 @@ with tab2:
             category_id = st.selectbox(
                 "Category",
                 options=[c["id"] for c in categories],
-                format_func=lambda x: next((c["name"] for c in categories if c["id"] == x), ""),
-                index=0 if not st.session_state.get("edit_goal_category") else 
-                    [i for i, c in enumerate(categories) if c["id"] == st.session_state.get("edit_goal_category")][0]
-                    if any(c["id"] == st.session_state.get("edit_goal_category") for c in categories) else 0
+                format_func=lambda x: categories_by_id[x]["name"] if x in categories_by_id else "",
+                index=get_category_index_by_id().get(st.session_state.get("edit_goal_category"), 0)
             )
         
         with col2:
@@ -365,12 +402,19 @@ with tab2:
 with tab3:
     st.subheader("Goal Progress Overview")
     
+    # Every tab runs on each rerun, so the analytics charts are only rebuilt after the goals change
+    goals_version = get_data_version("goals")
+    all_goals = st.session_state.get("goals", [])
+    
     # Goal progress chart
-    active_goals = [goal for goal in st.session_state.get("goals", []) 
-                   if not goal.get("completed", False)]
+    active_goals = [goal for goal in all_goals if not goal.get("completed", False)]
     
     if active_goals:
-        progress_chart = goal_progress_chart(active_goals)
+        progress_chart = get_session_cached(
+            "_goal_progress_chart",
+            goals_version,
+            lambda: goal_progress_chart(active_goals)
+        )
         
         if progress_chart:
             st.plotly_chart(progress_chart, use_container_width=True)
@@ -378,7 +422,6 @@ with tab3:
             st.info("Not enough data to generate the progress chart.")
         
         # Display completion statistics
-        all_goals = st.session_state.get("goals", [])
         completed_goals = [goal for goal in all_goals if goal.get("completed", False)]
         
         col1, col2, col3 = st.columns(3)
@@ -397,29 +440,20 @@ with tab3:
         if completed_goals:
             st.subheader("Goal Completion Time")
             
-            completion_times = []
-            for goal in completed_goals:
-                if goal.get("completed_at") and goal.get("created_at"):
-                    created = datetime.fromisoformat(goal["created_at"])
-                    completed = datetime.fromisoformat(goal["completed_at"])
-                    days_to_complete = (completed - created).days
-                    
-                    completion_times.append({
-                        "goal": goal["title"],
-                        "days": days_to_complete
-                    })
-            
-            if completion_times:
-                df = pd.DataFrame(completion_times)
-                df = df.sort_values("days")
+            def build_completion_time_chart():
+                # Whole days from creation to completion, for completed goals with both timestamps
+                goals_df = get_goals_df()
+                days = (goals_df["completed_dt"] - goals_df["created_dt"]).dt.days
+                timed = goals_df["completed"] & days.notna()
                 
-                # Calculate statistics
-                avg_days = df["days"].mean()
-                min_days = df["days"].min()
-                max_days = df["days"].max()
+                if not timed.any():
+                    return None
                 
-                st.write(f"On average, you complete goals in **{avg_days:.1f} days**.")
-                st.write(f"Your fastest goal completion was **{min_days} days**, and your longest was **{max_days} days**.")
+                df = pd.DataFrame({
+                    "goal": [all_goals[i]["title"] for i in goals_df.index[timed]],
+                    "days": days[timed].astype("int64").to_numpy()
+                })
+                df = df.sort_values("days")
                 
                 # Create a bar chart for goal completion times
                 import altair as alt
@@ -432,6 +466,25 @@ with tab3:
                     height=300
                 )
                 
+                return df, chart
+            
+            completion_time_chart = get_session_cached(
+                "_goal_completion_time_chart",
+                goals_version,
+                build_completion_time_chart
+            )
+            
+            if completion_time_chart:
+                df, chart = completion_time_chart
+                
+                # Calculate statistics
+                avg_days = df["days"].mean()
+                min_days = df["days"].min()
+                max_days = df["days"].max()
+                
+                st.write(f"On average, you complete goals in **{avg_days:.1f} days**.")
+                st.write(f"Your fastest goal completion was **{min_days} days**, and your longest was **{max_days} days**.")
+                
                 st.altair_chart(chart, use_container_width=True)
     else:
         st.info("No active goals found. Add some goals to see analytics.")
@@ -439,36 +492,24 @@ with tab3:
     # Category distribution
     st.subheader("Goals by Category")
     
-    all_goals = st.session_state.get("goals", [])
     if all_goals and categories:
-        category_counts = {}
-        
-        for goal in all_goals:
-            category_id = goal.get("category_id")
-            if category_id:
-                category = next((c for c in categories if c["id"] == category_id), None)
-                if category:
-                    category_name = category["name"]
-                    if category_name not in category_counts:
-                        category_counts[category_name] = {"total": 0, "completed": 0}
-                    
-                    category_counts[category_name]["total"] += 1
-                    if goal.get("completed", False):
-                        category_counts[category_name]["completed"] += 1
-        
-        if category_counts:
-            df = pd.DataFrame([
-                {
-                    "category": category,
-                    "total": stats["total"],
-                    "completed": stats["completed"]
-                }
-                for category, stats in category_counts.items()
-            ])
+        def build_category_chart():
+            # Count total and completed goals per category name, in the order the categories first appear
+            goals_df = get_goals_df()
+            category_names = goals_df["category_id"].map({category_id: c["name"] for category_id, c in categories_by_id.items()})
+            categorized = goals_df.assign(category=category_names).dropna(subset=["category"])
+            
+            if categorized.empty:
+                return None
+            
+            df = categorized.groupby("category", sort=False).agg(
+                total=("completed", "size"),
+                completed=("completed", "sum")
+            ).reset_index()
             
             import plotly.express as px
             
-            fig = px.bar(
+            return px.bar(
                 df,
                 x="category",
                 y=["completed", "total"],
@@ -477,8 +518,15 @@ with tab3:
                 height=400,
                 barmode="group"
             )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        
+        category_chart = get_session_cached(
+            "_goal_category_chart",
+            (goals_version, get_data_version("categories")),
+            build_category_chart
+        )
+        
+        if category_chart:
+            st.plotly_chart(category_chart, use_container_width=True)
         else:
             st.info("No categorized goals found.")
     else:
@@ -1,18 +1,69 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
 from datetime import datetime, timedelta
 import uuid
+import heapq
 from utils.data_manager import (
     initialize_session_state,
     save_user_data,
+    get_data_version,
+    get_session_cached,
     add_habit,
     check_in_habit,
-    delete_habit
+    delete_habit,
+    get_categories_by_id,
+    get_habit_check_ins,
+    get_habits_by_id,
+    get_habits_by_streak
 )
 from utils.visualization import habit_streak_chart, habit_heatmap
 from utils.ui import inject_custom_css
 from assets.icons import get_icon
 
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+STREAK_ROW_TEMPLATE = (
+    "<div style='display: flex; justify-content: space-between;'>"
+    "<span>{title}</span>"
+    "<span><b>{streak}</b> days</span>"
+    "</div>"
+)
+HABIT_CARD_TEMPLATE = (
+    "<div style='border: 1px solid {color}; border-radius: 5px; padding: 10px; margin-bottom: 15px;'>"
+    "<h3 style='color: {color}; margin-top: 0;'>{title}</h3>"
+    "<div style='display: flex; justify-content: space-between; margin-bottom: 5px;'>"
+    "<span style='color: #888;'>{category}</span>"
+    "<span style='color: #888;'>Frequency: {frequency}</span>"
+    "</div>"
+    "<div style='margin-bottom: 10px;'>{description}</div>"
+    "<div style='display: flex; justify-content: space-between;'>"
+    "<div><span style='font-weight: bold;'>{current_streak}</span> day streak</div>"
+    "<div>Best: <span style='font-weight: bold;'>{best_streak}</span> days</div>"
+    "</div>"
+    "</div>"
+)
+
+# Static cards (example habits, health tips) wrap three to a row, like st.columns(3) but in a single element
+CARD_GRID_TEMPLATE = "<div style='display: flex; flex-wrap: wrap; gap: 15px; margin-bottom: 15px;'>{}</div>"
+GRID_CARD_STYLE = "flex: 0 1 calc((100% - 30px) / 3); min-width: 220px; box-sizing: border-box; border-radius: 5px;"
+EXAMPLE_HABIT_CARD_TEMPLATE = (
+    "<div style='" + GRID_CARD_STYLE + " border: 1px solid #808080; padding: 10px;'>"
+    "<h3 style='margin-top: 0;'>{title}</h3>"
+    "<div style='color: #888;'>{category}</div>"
+    "<div style='margin-top: 5px;'>{description}</div>"
+    "</div>"
+)
+HEALTH_TIP_CARD_TEMPLATE = (
+    "<div style='" + GRID_CARD_STYLE + " border: 1px solid #888; padding: 15px;'>"
+    "<div style='display: flex; align-items: center; margin-bottom: 10px;'>"
+    "{icon}"
+    "<span style='font-weight: bold; margin-left: 5px;'>{title}</span>"
+    "</div>"
+    "<div>{description}</div>"
+    "</div>"
+)
+
 # Initialize session state
 initialize_session_state()
 
@@ -29,49 +80,66 @@ inject_custom_css()
 st.title("Health & Habits Tracker")
 st.write("Track your daily habits and monitor your health metrics to build a healthier lifestyle.")
 
+def select_habit(habit_id):
+    """Show the check-in history of the given habit below the habit cards"""
+    st.session_state["selected_habit_id"] = habit_id
+
+def close_habit_history():
+    """Hide the check-in history and go back to the habit cards"""
+    st.session_state.pop("selected_habit_id", None)
+
+def quick_add_habit(title, category_id):
+    """Start tracking one of the suggested habits, daily"""
+    add_habit(title=title, frequency="daily", category_id=category_id)
+
+# Quick check-ins. As a fragment, clicking a habit that's already checked in reruns only this list;
+# a new check-in still reruns the whole page so the streaks, cards and dashboard stay current.
+@st.fragment
+def render_quick_checkins():
+    # Fragment reruns skip the top of the script, so read the date again here
+    today = datetime.now().date().isoformat()
+    check_ins_by_id = get_habit_check_ins()
+    
+    for habit in st.session_state.get("habits", []):
+        # Check if already checked in for today
+        is_checked = today in check_ins_by_id[habit["id"]]
+        
+        col1, col2 = st.columns([0.7, 0.3])
+        
+        with col1:
+            st.write(habit["title"])
+        
+        with col2:
+            if st.button(
+                "✓" if is_checked else "○", 
+                key=f"quick_checkin_{habit['id']}",
+                help="Click to mark as completed"
+            ):
+                # Toggle check-in status
+                if not is_checked:
+                    check_in_habit(habit["id"])
+                    st.success(f"Checked in for {habit['title']}!")
+                    st.rerun()
+
 # Sidebar for quick check-ins
 with st.sidebar:
     st.header("Today's Check-ins")
     
-    # Get today's date
-    today = datetime.now().date().isoformat()
-    
     # Get habits
     habits = st.session_state.get("habits", [])
     
     if habits:
-        for habit in habits:
-            # Check if already checked in for today
-            is_checked = today in habit.get("check_ins", [])
-            
-            col1, col2 = st.columns([0.7, 0.3])
-            
-            with col1:
-                st.write(habit["title"])
-            
-            with col2:
-                if st.button(
-                    "✓" if is_checked else "○", 
-                    key=f"quick_checkin_{habit['id']}",
-                    help="Click to mark as completed"
-                ):
-                    # Toggle check-in status
-                    if not is_checked:
-                        check_in_habit(habit["id"])
-                        st.success(f"Checked in for {habit['title']}!")
-                    st.rerun()
+        render_quick_checkins()
         
         # Show streaks
         st.write("---")
         st.subheader("Current Streaks")
         
-        for habit in sorted(habits, key=lambda x: x.get("current_streak", 0), reverse=True):
-            st.markdown(f"""
-            <div style='display: flex; justify-content: space-between;'>
-                <span>{habit['title']}</span>
-                <span><b>{habit.get('current_streak', 0)}</b> days</span>
-            </div>
-            """, unsafe_allow_html=True)
+        # One markdown element for the whole list rather than one per habit
+        st.markdown("".join(
+            STREAK_ROW_TEMPLATE.format(title=habit["title"], streak=habit.get("current_streak", 0))
+            for habit in get_habits_by_streak()
+        ), unsafe_allow_html=True)
     else:
         st.info("No habits added yet. Add habits in the Habits tab below.")
     
@@ -87,53 +155,52 @@ with st.sidebar:
     else:
         st.info("No health priorities set. Update your profile in Settings.")
 
-# Main content tabs
-tab1, tab2, tab3 = st.tabs(["Habits", "Health Dashboard", "Add New Habit"])
-
-# Habits tab
-with tab1:
+# Main content
+# Habits tab. As a fragment, opening a habit's history or checking in twice on one day reruns only this block;
+# anything that changes a habit still reruns the whole page so the sidebar and dashboard stay current.
+@st.fragment
+def render_habits_tab():
     habits = st.session_state.get("habits", [])
+    categories_by_id = get_categories_by_id()
+    check_ins_by_id = get_habit_check_ins()
     
     if habits:
-        # Sort habits by current streak (descending)
-        sorted_habits = sorted(habits, key=lambda x: x.get("current_streak", 0), reverse=True)
+        # Card markup for every habit, formatted only after the habits or categories change
+        def build_habit_cards():
+            cards = {}
+            for habit in habits:
+                category = categories_by_id.get(habit.get("category_id"))
+                
+                cards[habit["id"]] = HABIT_CARD_TEMPLATE.format(
+                    color=category["color"] if category else "#808080",
+                    title=habit["title"],
+                    category=category["name"] if category else "Uncategorized",
+                    frequency=habit.get("frequency", "daily"),
+                    description=habit.get("description", ""),
+                    current_streak=habit.get("current_streak", 0),
+                    best_streak=habit.get("best_streak", 0)
+                )
+            return cards
+        
+        habit_cards = get_session_cached(
+            "_habit_cards",
+            (get_data_version("habits"), get_data_version("categories")),
+            build_habit_cards
+        )
         
         # Create columns for habits
         cols = st.columns(3)
         
-        for i, habit in enumerate(sorted_habits):
+        for i, habit in enumerate(get_habits_by_streak()):
             with cols[i % 3]:
-                # Get category info
-                category = next((c for c in st.session_state.get("categories", []) 
-                               if c["id"] == habit.get("category_id")), None)
-                category_color = category["color"] if category else "#808080"
-                category_name = category["name"] if category else "Uncategorized"
-                
-                # Create habit card
-                st.markdown(f"""
-                <div style='border: 1px solid {category_color}; border-radius: 5px; padding: 10px; margin-bottom: 15px;'>
-                    <h3 style='color: {category_color}; margin-top: 0;'>{habit['title']}</h3>
-                    <div style='display: flex; justify-content: space-between; margin-bottom: 5px;'>
-                        <span style='color: #888;'>{category_name}</span>
-                        <span style='color: #888;'>Frequency: {habit.get('frequency', 'daily')}</span>
-                    </div>
-                    <div style='margin-bottom: 10px;'>{habit.get('description', '')}</div>
-                    <div style='display: flex; justify-content: space-between;'>
-                        <div>
-                            <span style='font-weight: bold;'>{habit.get('current_streak', 0)}</span> day streak
-                        </div>
-                        <div>
-                            Best: <span style='font-weight: bold;'>{habit.get('best_streak', 0)}</span> days
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+                # Habit card
+                st.markdown(habit_cards[habit["id"]], unsafe_allow_html=True)
                 
                 # Check-in button
                 if st.button("Check In", key=f"checkin_{habit['id']}"):
                     today = datetime.now().date().isoformat()
                     
-                    if today not in habit.get("check_ins", []):
+                    if today not in check_ins_by_id[habit["id"]]:
                         check_in_habit(habit["id"])
                         st.success(f"Checked in for {habit['title']}!")
                         st.rerun()
@@ -144,9 +211,7 @@ with tab1:
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    if st.button("View History", key=f"history_{habit['id']}"):
-                        st.session_state["selected_habit_id"] = habit["id"]
-                        st.rerun()
+                    st.button("View History", key=f"history_{habit['id']}", on_click=select_habit, args=(habit["id"],))
                 
                 with col2:
                     if st.button("Delete", key=f"delete_{habit['id']}"):
@@ -156,7 +221,7 @@ with tab1:
         
         # Show habit history if selected
         if "selected_habit_id" in st.session_state:
-            selected_habit = next((h for h in habits if h["id"] == st.session_state["selected_habit_id"]), None)
+            selected_habit = get_habits_by_id().get(st.session_state["selected_habit_id"])
             
             if selected_habit:
                 st.markdown("---")
@@ -170,15 +235,14 @@ with tab1:
                 
                 # Check-in history
                 if selected_habit.get("check_ins"):
-                    # Convert to datetime objects and sort
-                    check_in_dates = [datetime.fromisoformat(d) for d in selected_habit["check_ins"]]
-                    check_in_dates.sort(reverse=True)
+                    # Check-ins are ISO dates, so the most recent ten are the ten largest strings
+                    recent_check_ins = heapq.nlargest(10, selected_habit["check_ins"])
                     
                     st.write("Recent check-ins:")
                     
                     # Show recent check-ins
-                    for date in check_in_dates[:10]:
-                        st.write(f"- {date.strftime('%Y-%m-%d')}")
+                    for check_in in recent_check_ins:
+                        st.write(f"- {check_in}")
                     
                     # Show option to clear history
                     if st.button("Clear Check-in History"):
@@ -187,13 +251,10 @@ with tab1:
                             st.session_state["confirm_clear"] = True
                             st.warning("Are you sure? This will reset your streak. Click again to confirm.")
                         else:
-                            # Clear check-ins
-                            for i, habit in enumerate(st.session_state["habits"]):
-                                if habit["id"] == selected_habit["id"]:
-                                    st.session_state["habits"][i]["check_ins"] = []
-                                    st.session_state["habits"][i]["current_streak"] = 0
-                                    save_user_data()
-                                    break
+                            # Clear check-ins (selected_habit is the stored habit itself)
+                            selected_habit["check_ins"] = []
+                            selected_habit["current_streak"] = 0
+                            save_user_data("habits")
                             
                             # Clear confirmation and selected habit
                             del st.session_state["confirm_clear"]
@@ -205,10 +266,7 @@ with tab1:
                     st.info("No check-ins recorded yet.")
                 
                 # Button to go back
-                if st.button("Back to All Habits"):
-                    if "selected_habit_id" in st.session_state:
-                        del st.session_state["selected_habit_id"]
-                    st.rerun()
+                st.button("Back to All Habits", on_click=close_habit_history)
     else:
         st.info("No habits tracked yet. Add some habits to get started!")
         
@@ -223,16 +281,16 @@ with tab1:
             {"title": "Read for 30 minutes", "description": "Read books, articles, or anything you enjoy", "category": "Learning"}
         ]
         
-        cols = st.columns(3)
-        for i, habit in enumerate(example_habits):
-            with cols[i % 3]:
-                st.markdown(f"""
-                <div style='border: 1px solid #808080; border-radius: 5px; padding: 10px; margin-bottom: 15px;'>
-                    <h3 style='margin-top: 0;'>{habit['title']}</h3>
-                    <div style='color: #888;'>{habit['category']}</div>
-                    <div style='margin-top: 5px;'>{habit['description']}</div>
-                </div>
-                """, unsafe_allow_html=True)
+        # The cards have no widgets, so lay them out three to a row in one HTML element
+        st.html(CARD_GRID_TEMPLATE.format("".join(
+            EXAMPLE_HABIT_CARD_TEMPLATE.format(**habit) for habit in example_habits
+        )))
+
+tab1, tab2, tab3 = st.tabs(["Habits", "Health Dashboard", "Add New Habit"])
+
+# Habits tab
+with tab1:
+    render_habits_tab()
 
 # Health Dashboard tab
 with tab2:
@@ -247,30 +305,56 @@ with tab2:
         if streak_chart:
             st.plotly_chart(streak_chart, use_container_width=True)
         
-        # Show habit completion rate
-        st.subheader("Habit Completion Rate")
-        
-        # Calculate completion rate for the last 7 days
+        # Aggregate the check-ins once per data change (and per day, since the window moves)
         today = datetime.now().date()
-        last_week = [(today - timedelta(days=i)).isoformat() for i in range(7)]
         
-        completion_data = []
-        for habit in habits:
-            check_ins = habit.get("check_ins", [])
-            days_checked = sum(1 for day in last_week if day in check_ins)
-            completion_rate = (days_checked / 7) * 100
+        def build_habit_dashboard():
+            # Flatten every habit's check-ins into one frame of (habit position, date)
+            check_ins = pd.DataFrame(
+                [(i, check_in) for i, habit in enumerate(habits) for check_in in habit.get("check_ins", [])],
+                columns=["habit", "date"]
+            )
             
-            completion_data.append({
-                "habit": habit["title"],
-                "completion_rate": completion_rate
+            # Count the distinct last-week days each habit was checked in on
+            last_week = [(today - timedelta(days=i)).isoformat() for i in range(7)]
+            days_checked = (
+                check_ins[check_ins["date"].isin(last_week)]
+                .groupby("habit")["date"].nunique()
+                .reindex(range(len(habits)), fill_value=0)
+            )
+            completion_df = pd.DataFrame({
+                "habit": [habit["title"] for habit in habits],
+                "completion_rate": (days_checked.to_numpy() / 7 * 100).astype("float32")
             })
-        
-        if completion_data:
-            df = pd.DataFrame(completion_data)
             
-            import altair as alt
+            # Count check-ins per day of week, indexed by an ordered categorical so the chart keeps calendar order
+            day_df = day_extremes = None
+            if not check_ins.empty:
+                day_counts = (
+                    pd.to_datetime(check_ins["date"], format="ISO8601")
+                    .dt.day_name()
+                    .value_counts()
+                    .reindex(pd.CategoricalIndex(DAYS_OF_WEEK, categories=DAYS_OF_WEEK, ordered=True), fill_value=0)
+                )
+                day_df = day_counts.rename_axis("day").reset_index(name="count")
+                
+                # Best and worst days with their counts (the first in calendar order wins a tie)
+                best_day, worst_day = day_counts.idxmax(), day_counts.idxmin()
+                day_extremes = ((best_day, day_counts[best_day]), (worst_day, day_counts[worst_day]))
             
-            chart = alt.Chart(df).mark_bar().encode(
+            return completion_df, day_df, day_extremes
+        
+        completion_df, day_df, day_extremes = get_session_cached(
+            "_habit_dashboard",
+            (get_data_version("habits"), today),
+            build_habit_dashboard
+        )
+        
+        # Show habit completion rate
+        st.subheader("Habit Completion Rate")
+        
+        if not completion_df.empty:
+            chart = alt.Chart(completion_df).mark_bar().encode(
                 x=alt.X('habit:N', title='Habit'),
                 y=alt.Y('completion_rate:Q', title='Completion Rate (%)')
             ).properties(
@@ -283,33 +367,9 @@ with tab2:
         # Show which days have the highest check-in rate
         st.subheader("Check-ins by Day of Week")
         
-        # Gather all check-ins for all habits
-        all_check_ins = []
-        for habit in habits:
-            all_check_ins.extend(habit.get("check_ins", []))
-        
-        if all_check_ins:
-            # Convert to day of week
-            day_counts = {}
-            for check_in in all_check_ins:
-                day = datetime.fromisoformat(check_in).strftime("%A")
-                if day not in day_counts:
-                    day_counts[day] = 0
-                day_counts[day] += 1
-            
-            # Order days of week correctly
-            days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            ordered_days = {day: day_counts.get(day, 0) for day in days_order}
-            
-            df = pd.DataFrame({
-                "day": list(ordered_days.keys()),
-                "count": list(ordered_days.values())
-            })
-            
-            import altair as alt
-            
-            chart = alt.Chart(df).mark_bar().encode(
-                x=alt.X('day:N', title='Day of Week', sort=days_order),
+        if day_df is not None:
+            chart = alt.Chart(day_df).mark_bar().encode(
+                x=alt.X('day', title='Day of Week'),
                 y=alt.Y('count:Q', title='Number of Check-ins')
             ).properties(
                 title='Check-ins by Day of Week',
@@ -318,12 +378,10 @@ with tab2:
             
             st.altair_chart(chart, use_container_width=True)
             
-            # Identify best and worst days
-            best_day = max(ordered_days.items(), key=lambda x: x[1])
-            worst_day = min(ordered_days.items(), key=lambda x: x[1])
+            (best_day, best_count), (worst_day, worst_count) = day_extremes
             
-            st.write(f"Your most consistent day is **{best_day[0]}** with {best_day[1]} check-ins.")
-            st.write(f"Your least consistent day is **{worst_day[0]}** with {worst_day[1]} check-ins.")
+            st.write(f"Your most consistent day is **{best_day}** with {best_count} check-ins.")
+            st.write(f"Your least consistent day is **{worst_day}** with {worst_count} check-ins.")
     else:
         st.info("No habits tracked yet. Add some habits to see your health dashboard.")
         
@@ -359,19 +417,14 @@ with tab2:
         }
     ]
     
-    cols = st.columns(3)
-    
-    for i, tip in enumerate(health_tips):
-        with cols[i % 3]:
-            st.html(f"""
-            <div style='border: 1px solid #888; border-radius: 5px; padding: 15px; margin-bottom: 15px;'>
-                <div style='display: flex; align-items: center; margin-bottom: 10px;'>
-                    {get_icon(tip['icon'], color='#7792E3', size=20)}
-                    <span style='font-weight: bold; margin-left: 5px;'>{tip['title']}</span>
-                </div>
-                <div>{tip['description']}</div>
-            </div>
-            """)
+    st.html(CARD_GRID_TEMPLATE.format("".join(
+        HEALTH_TIP_CARD_TEMPLATE.format(
+            icon=get_icon(tip["icon"], color="#7792E3", size=20),
+            title=tip["title"],
+            description=tip["description"]
+        )
+        for tip in health_tips
+    )))
 
 # Add New Habit tab
 with tab3:
@@ -397,15 +450,16 @@ with tab3:
         with col2:
             # Get categories with 'Health' or similar categories first
             categories = st.session_state.get("categories", [])
-            health_categories = [c for c in categories if "health" in c["name"].lower()]
-            other_categories = [c for c in categories if "health" not in c["name"].lower()]
-            sorted_categories = health_categories + other_categories
+            categories_by_id = get_categories_by_id()
+            
+            # The sort is stable, so each group keeps its order and the first health category is the default
+            sorted_categories = sorted(categories, key=lambda c: "health" not in c["name"].lower())
             
             category_id = st.selectbox(
                 "Category",
                 options=[c["id"] for c in sorted_categories],
-                format_func=lambda x: next((c["name"] for c in categories if c["id"] == x), ""),
-                index=0 if not health_categories else [i for i, c in enumerate(sorted_categories) if c["id"] == health_categories[0]["id"]][0]
+                format_func=lambda x: categories_by_id[x]["name"] if x in categories_by_id else "",
+                index=0
             )
         
         # Reminder settings
@@ -451,22 +505,14 @@ with tab3:
         "Stand up and move every hour"
     ]
     
+    # Quick-added habits go in the first health category, or the first category if there is none;
+    # that's the head of the form's health-first ordering
+    default_category_id = sorted_categories[0]["id"] if sorted_categories else None
+    
     # Create buttons for quick addition
     cols = st.columns(3)
     
     for i, habit in enumerate(common_habits):
         with cols[i % 3]:
-            if st.button(habit, key=f"quickadd_{i}"):
-                # Find a suitable health category, or use the first category
-                health_categories = [c for c in categories if "health" in c["name"].lower()]
-                category_id = health_categories[0]["id"] if health_categories else categories[0]["id"] if categories else None
-                
-                # Add the habit
-                new_habit = add_habit(
-                    title=habit,
-                    frequency="daily",
-                    category_id=category_id
-                )
-                
-                st.success(f"Added new habit: {habit}")
-                st.rerun()
+            # The habit is added before the rerun starts, so the whole page already shows it
+            st.button(habit, key=f"quickadd_{i}", on_click=quick_add_habit, args=(habit, default_category_id))
@@ -1,10 +1,20 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import altair as alt
 from datetime import datetime, timedelta
-from utils.data_manager import initialize_session_state
+from utils.data_manager import (
+    initialize_session_state,
+    get_data_version,
+    get_session_cached,
+    get_check_ins_df,
+    get_earliest_created_date,
+    get_events_df,
+    get_goals_df,
+    get_tasks_df
+)
 from utils.visualization import (
     task_completion_chart,
     task_completion_by_category,
@@ -69,36 +79,7 @@ with st.sidebar:
             start_date = end_date - timedelta(days=90)
         else:  # All Time
             # Use the earliest recorded data or default to 1 year
-            all_dates = []
-            
-            # Extract dates from tasks
-            for task in st.session_state.get("tasks", []):
-                if "created_at" in task:
-                    try:
-                        all_dates.append(datetime.fromisoformat(task["created_at"]).date())
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Extract dates from goals
-            for goal in st.session_state.get("goals", []):
-                if "created_at" in goal:
-                    try:
-                        all_dates.append(datetime.fromisoformat(goal["created_at"]).date())
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Extract dates from habits
-            for habit in st.session_state.get("habits", []):
-                if "created_at" in habit:
-                    try:
-                        all_dates.append(datetime.fromisoformat(habit["created_at"]).date())
-                    except (ValueError, TypeError):
-                        pass
-            
-            if all_dates:
-                start_date = min(all_dates)
-            else:
-                start_date = end_date - timedelta(days=365)
+            start_date = get_earliest_created_date() or end_date - timedelta(days=365)
     
     # Data filters
     st.header("Filters")
@@ -123,6 +104,96 @@ with st.sidebar:
             if c["name"] in selected_category
         ]
 
+def filter_analytics_data(start_date, end_date, category_filter):
+    """Return the tasks, goals, habits and events in the date range and categories, shared by every tab.
+    
+    Built once per data or filter change. Dates come pre-parsed from the cached frames, so unparseable
+    dates are NaT and never in range; each *_df entry is the matching slice of its frame.
+    """
+    def build():
+        tasks = st.session_state.get("tasks", [])
+        goals = st.session_state.get("goals", [])
+        habits = st.session_state.get("habits", [])
+        events = st.session_state.get("calendar_events", [])
+        range_start, range_end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        
+        def in_categories(category_ids):
+            # No selected categories means no category filter
+            return category_ids.isin(category_filter) if category_filter else True
+        
+        tasks_df = get_tasks_df()
+        tasks_df = tasks_df[
+            tasks_df["created_dt"].dt.normalize().between(range_start, range_end)
+            & in_categories(tasks_df["category_id"])
+        ]
+        
+        goals_df = get_goals_df()
+        goals_df = goals_df[
+            goals_df["created_dt"].dt.normalize().between(range_start, range_end)
+            & in_categories(goals_df["category_id"])
+        ]
+        
+        # Keep only the check-ins within the date range, and the habits that have any
+        check_ins_df = get_check_ins_df()
+        check_ins_in_range = check_ins_df[check_ins_df["check_in_dt"].dt.normalize().between(range_start, range_end)]
+        
+        filtered_habits = []
+        habit_rows = []
+        for i, filtered_checkins in check_ins_in_range.groupby("habit")["check_in"]:
+            habit = habits[i]
+            if not category_filter or habit.get("category_id") in category_filter:
+                habit_copy = habit.copy()
+                habit_copy["check_ins"] = filtered_checkins.tolist()
+                filtered_habits.append(habit_copy)
+                habit_rows.append(i)
+        
+        habits_df = pd.DataFrame({
+            "title": [habit.get("title", "") for habit in filtered_habits],
+            "current_streak": pd.Series([habit.get("current_streak", 0) for habit in filtered_habits], dtype="int64"),
+            "best_streak": pd.Series([habit.get("best_streak", 0) for habit in filtered_habits], dtype="int64"),
+        })
+        
+        # The overview counts events that start in the range; time management also counts
+        # events that end in it or span all of it, as long as both times are valid
+        events_df = get_events_df()
+        start_days = events_df["start_dt"].dt.normalize()
+        end_days = events_df["end_dt"].dt.normalize()
+        event_categories = in_categories(events_df["category_id"])
+        starts_in_range = start_days.between(range_start, range_end)
+        starting_df = events_df[starts_in_range & event_categories]
+        overlapping_df = events_df[
+            (starts_in_range | end_days.between(range_start, range_end) | ((start_days <= range_start) & (end_days >= range_end)))
+            & start_days.notna() & end_days.notna() & event_categories
+        ]
+        
+        return {
+            "tasks": [tasks[i] for i in tasks_df.index],
+            "tasks_df": tasks_df,
+            "goals": [goals[i] for i in goals_df.index],
+            "goals_df": goals_df,
+            "habits": filtered_habits,
+            "habits_df": habits_df,
+            "check_ins_df": check_ins_in_range[check_ins_in_range["habit"].isin(habit_rows)],
+            "events": [events[i] for i in starting_df.index],
+            "overlapping_events": [events[i] for i in overlapping_df.index],
+            "overlapping_events_df": overlapping_df,
+        }
+    
+    return get_session_cached(
+        "_analytics_filtered_data",
+        (
+            tuple(get_data_version(key) for key in ("tasks", "goals", "habits", "calendar_events")),
+            start_date,
+            end_date,
+            tuple(category_filter)
+        ),
+        build
+    )
+
+# Filter the data once for all the tabs
+filtered_data = filter_analytics_data(start_date, end_date, category_filter)
+range_start, range_end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
 # Main content with dashboard sections
 tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Task Analysis", "Goals & Habits", "Time Management"])
 
@@ -130,75 +201,18 @@ tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Task Analysis", "Goals & Habits",
 with tab1:
     st.subheader("Dashboard Overview")
     
-    # Filter tasks, goals, habits, and events based on date range
-    tasks = st.session_state.get("tasks", [])
-    goals = st.session_state.get("goals", [])
-    habits = st.session_state.get("habits", [])
-    events = st.session_state.get("calendar_events", [])
-    
-    filtered_tasks = []
-    for task in tasks:
-        # Check if created_at is within date range
-        if "created_at" in task:
-            try:
-                created_date = datetime.fromisoformat(task["created_at"]).date()
-                if start_date <= created_date <= end_date:
-                    # Apply category filter if available
-                    if not category_filter or task.get("category_id") in category_filter:
-                        filtered_tasks.append(task)
-            except (ValueError, TypeError):
-                pass
-    
-    filtered_goals = []
-    for goal in goals:
-        # Check if created_at is within date range
-        if "created_at" in goal:
-            try:
-                created_date = datetime.fromisoformat(goal["created_at"]).date()
-                if start_date <= created_date <= end_date:
-                    # Apply category filter if available
-                    if not category_filter or goal.get("category_id") in category_filter:
-                        filtered_goals.append(goal)
-            except (ValueError, TypeError):
-                pass
-    
-    filtered_habits = []
-    for habit in habits:
-        # Include habits with check-ins within date range
-        if "check_ins" in habit:
-            habit_in_range = False
-            for check_in in habit["check_ins"]:
-                try:
-                    check_date = datetime.fromisoformat(check_in).date()
-                    if start_date <= check_date <= end_date:
-                        habit_in_range = True
-                        break
-                except (ValueError, TypeError):
-                    pass
-            
-            if habit_in_range:
-                # Apply category filter if available
-                if not category_filter or habit.get("category_id") in category_filter:
-                    filtered_habits.append(habit)
-    
-    filtered_events = []
-    for event in events:
-        # Check if start_time is within date range
-        if "start_time" in event:
-            try:
-                start_time = datetime.fromisoformat(event["start_time"]).date()
-                if start_date <= start_time <= end_date:
-                    # Apply category filter if available
-                    if not category_filter or event.get("category_id") in category_filter:
-                        filtered_events.append(event)
-            except (ValueError, TypeError):
-                pass
+    filtered_tasks = filtered_data["tasks"]
+    filtered_tasks_df = filtered_data["tasks_df"]
+    filtered_goals = filtered_data["goals"]
+    filtered_habits = filtered_data["habits"]
+    habits_df = filtered_data["habits_df"]
+    filtered_events = filtered_data["events"]
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        completed_tasks = sum(1 for task in filtered_tasks if task.get("completed", False))
+        completed_tasks = int(filtered_data["tasks_df"]["completed"].sum())
         total_tasks = len(filtered_tasks)
         completion_rate = f"{int((completed_tasks / total_tasks) * 100)}%" if total_tasks > 0 else "0%"
         
@@ -209,7 +223,7 @@ with tab1:
         )
     
     with col2:
-        completed_goals = sum(1 for goal in filtered_goals if goal.get("completed", False))
+        completed_goals = int(filtered_data["goals_df"]["completed"].sum())
         total_goals = len(filtered_goals)
         goal_rate = f"{int((completed_goals / total_goals) * 100)}%" if total_goals > 0 else "0%"
         
@@ -221,8 +235,8 @@ with tab1:
     
     with col3:
         if filtered_habits:
-            avg_streak = sum(habit.get("current_streak", 0) for habit in filtered_habits) / len(filtered_habits)
-            max_streak = max((habit.get("current_streak", 0) for habit in filtered_habits), default=0)
+            avg_streak = habits_df["current_streak"].mean()
+            max_streak = habits_df["current_streak"].max()
             
             st.metric(
                 "Average Habit Streak",
@@ -278,65 +292,35 @@ with tab1:
     
     # Productivity insights
     if filtered_tasks:
-        # Check productivity by day of week
-        day_productivity = {}
-        for task in filtered_tasks:
-            if task.get("completed", False) and "completed_at" in task:
-                try:
-                    completed_date = datetime.fromisoformat(task["completed_at"])
-                    day_of_week = completed_date.strftime("%A")
-                    
-                    if day_of_week not in day_productivity:
-                        day_productivity[day_of_week] = 0
-                    
-                    day_productivity[day_of_week] += 1
-                except (ValueError, TypeError):
-                    pass
-        
-        if day_productivity:
-            most_productive_day = max(day_productivity.items(), key=lambda x: x[1])
-            insights.append(f"You're most productive on **{most_productive_day[0]}**, completing {most_productive_day[1]} tasks.")
+        # Check productivity by day of week; unsorted counts keep first-seen order, so ties go to the earliest day seen
+        day_productivity = (
+            filtered_tasks_df.loc[filtered_tasks_df["completed"], "completed_dt"]
+            .dropna()
+            .dt.day_name()
+            .value_counts(sort=False)
+        )
+        
+        if not day_productivity.empty:
+            most_productive_day = day_productivity.idxmax()
+            insights.append(f"You're most productive on **{most_productive_day}**, completing {day_productivity[most_productive_day]} tasks.")
     
     # Task completion rate trend
     if len(filtered_tasks) >= 10:
-        # Get completion rate over time
-        completion_dates = {}
-        for task in filtered_tasks:
-            if task.get("completed", False) and "completed_at" in task:
-                try:
-                    completed_date = datetime.fromisoformat(task["completed_at"]).date()
-                    date_str = completed_date.isoformat()
-                    
-                    if date_str not in completion_dates:
-                        completion_dates[date_str] = {"completed": 0, "total": 0}
-                    
-                    completion_dates[date_str]["completed"] += 1
-                except (ValueError, TypeError):
-                    pass
-        
-        # Count total tasks by created date
-        for task in filtered_tasks:
-            if "created_at" in task:
-                try:
-                    created_date = datetime.fromisoformat(task["created_at"]).date()
-                    date_str = created_date.isoformat()
-                    
-                    if date_str not in completion_dates:
-                        completion_dates[date_str] = {"completed": 0, "total": 0}
-                    
-                    completion_dates[date_str]["total"] += 1
-                except (ValueError, TypeError):
-                    pass
-        
-        # Calculate completion rates
-        dates = sorted(completion_dates.keys())
-        rates = []
-        
-        for date_str in dates:
-            data = completion_dates[date_str]
-            if data["total"] > 0:
-                rate = (data["completed"] / data["total"]) * 100
-                rates.append(rate)
+        # Get completion rate over time: tasks completed on each day vs. tasks created on it
+        completed_per_day = (
+            filtered_tasks_df.loc[filtered_tasks_df["completed"], "completed_dt"]
+            .dropna()
+            .dt.normalize()
+            .value_counts()
+        )
+        created_per_day = filtered_tasks_df["created_dt"].dt.normalize().value_counts()
+        per_day = pd.concat(
+            [completed_per_day.rename("completed"), created_per_day.rename("total")], axis=1
+        ).fillna(0).sort_index()
+        
+        # Calculate completion rates, in date order, for the days that had tasks created
+        per_day = per_day[per_day["total"] > 0]
+        rates = ((per_day["completed"] / per_day["total"]) * 100).tolist()
         
         if len(rates) >= 3:
             # Check if completion rate is trending up or down
@@ -346,47 +330,39 @@ with tab1:
     # Habit streak insights
     if filtered_habits:
         # Find habit with longest streak
-        longest_streak_habit = max(filtered_habits, key=lambda x: x.get("current_streak", 0))
-        if longest_streak_habit.get("current_streak", 0) > 0:
+        longest_streak_habit = habits_df.loc[habits_df["current_streak"].idxmax()]
+        if longest_streak_habit["current_streak"] > 0:
             insights.append(f"Your longest current habit streak is **{longest_streak_habit['current_streak']} days** for {longest_streak_habit['title']}.")
         
-        # Find habits with broken streaks
-        broken_streaks = []
-        for habit in filtered_habits:
-            if "check_ins" in habit and habit.get("current_streak", 0) < habit.get("best_streak", 0):
-                broken_streaks.append(habit)
+        # Find habits with broken streaks; nlargest keeps list order among equal gaps
+        broken_streaks = habits_df[habits_df["current_streak"] < habits_df["best_streak"]]
         
-        if broken_streaks:
-            habits_to_rebuild = min(3, len(broken_streaks))
-            habit_names = [h["title"] for h in sorted(broken_streaks, key=lambda x: x.get("best_streak", 0) - x.get("current_streak", 0), reverse=True)[:habits_to_rebuild]]
+        if not broken_streaks.empty:
+            habit_names = (
+                broken_streaks.assign(gap=broken_streaks["best_streak"] - broken_streaks["current_streak"])
+                .nlargest(3, "gap")["title"]
+                .tolist()
+            )
             insights.append(f"Consider rebuilding your streak for: **{', '.join(habit_names)}**")
     
     # Category focus insights
     if filtered_tasks and categories:
-        # Calculate time spent per category
-        category_time = {}
-        for task in filtered_tasks:
-            category_id = task.get("category_id")
-            if category_id:
-                category = next((c for c in categories if c["id"] == category_id), None)
-                if category:
-                    category_name = category["name"]
-                    if category_name not in category_time:
-                        category_time[category_name] = 0
-                    
-                    # Estimate time based on importance/urgency
-                    importance = task.get("importance", 3)
-                    urgency = task.get("urgency", 3)
-                    estimated_time = (importance + urgency) * 15  # minutes
-                    
-                    category_time[category_name] += estimated_time
-        
-        if category_time:
+        # Calculate time spent per category, joining each task to its category's name
+        category_names = pd.DataFrame(categories)[["id", "name"]].drop_duplicates("id").rename(columns={"id": "category_id"})
+        category_tasks = filtered_data["tasks_df"].merge(category_names, on="category_id")
+        
+        # Estimate time based on importance/urgency
+        estimated_time = (category_tasks["importance"].astype("int64") + category_tasks["urgency"].astype("int64")) * 15  # minutes
+        
+        # Unsorted groups keep first-seen order, so ties go to the category seen first
+        category_time = estimated_time.groupby(category_tasks["name"], sort=False).sum()
+        
+        if not category_time.empty:
             # Find category with most time
-            most_time_category = max(category_time.items(), key=lambda x: x[1])
-            most_time_hours = most_time_category[1] / 60
+            most_time_category = category_time.idxmax()
+            most_time_hours = category_time[most_time_category] / 60
             
-            insights.append(f"You've spent the most time on **{most_time_category[0]}** tasks (approximately {most_time_hours:.1f} hours).")
+            insights.append(f"You've spent the most time on **{most_time_category}** tasks (approximately {most_time_hours:.1f} hours).")
     
     # Display insights
     if insights:
@@ -399,58 +375,32 @@ with tab1:
 with tab2:
     st.subheader("Task Analysis")
     
-    # Filter tasks based on date range
-    filtered_tasks = []
-    for task in st.session_state.get("tasks", []):
-        # Check if created_at is within date range
-        if "created_at" in task:
-            try:
-                created_date = datetime.fromisoformat(task["created_at"]).date()
-                if start_date <= created_date <= end_date:
-                    # Apply category filter
-                    if not category_filter or task.get("category_id") in category_filter:
-                        filtered_tasks.append(task)
-            except (ValueError, TypeError):
-                pass
+    filtered_tasks = filtered_data["tasks"]
+    filtered_tasks_df = filtered_data["tasks_df"]
     
     # Task metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
         total_tasks = len(filtered_tasks)
-        completed_tasks = sum(1 for task in filtered_tasks if task.get("completed", False))
+        completed_tasks = int(filtered_tasks_df["completed"].sum())
         completion_rate = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
         
         st.metric("Task Completion Rate", f"{completion_rate:.1f}%")
     
     with col2:
         # Calculate average time to complete tasks
-        completion_times = []
-        for task in filtered_tasks:
-            if task.get("completed", False) and "created_at" in task and "completed_at" in task:
-                try:
-                    created = datetime.fromisoformat(task["created_at"])
-                    completed = datetime.fromisoformat(task["completed_at"])
-                    hours_to_complete = (completed - created).total_seconds() / 3600
-                    completion_times.append(hours_to_complete)
-                except (ValueError, TypeError):
-                    pass
-        
-        avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else 0
+        completed_df = filtered_tasks_df[filtered_tasks_df["completed"]]
+        completion_times = (completed_df["completed_dt"] - completed_df["created_dt"]).dt.total_seconds().dropna() / 3600
+        
+        avg_completion_time = completion_times.mean() if not completion_times.empty else 0
         
         st.metric("Avg. Completion Time", f"{avg_completion_time:.1f} hours")
     
     with col3:
         # Calculate overdue tasks
-        overdue_tasks = 0
-        for task in filtered_tasks:
-            if not task.get("completed", False) and "due_date" in task and task["due_date"]:
-                try:
-                    due_date = datetime.fromisoformat(task["due_date"]).date()
-                    if due_date < datetime.now().date():
-                        overdue_tasks += 1
-                except (ValueError, TypeError):
-                    pass
+        overdue = ~filtered_tasks_df["completed"] & (filtered_tasks_df["due_date"].dt.normalize() < pd.Timestamp(datetime.now().date()))
+        overdue_tasks = int(overdue.sum())
         
         st.metric("Overdue Tasks", overdue_tasks)
     
@@ -469,44 +419,24 @@ with tab2:
     # Task creation vs completion over time
     st.subheader("Task Creation vs Completion Over Time")
     
-    # Prepare data
-    date_data = {}
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.isoformat()
-        date_data[date_str] = {"created": 0, "completed": 0}
-        current_date += timedelta(days=1)
-    
-    # Count created tasks by date
-    for task in filtered_tasks:
-        if "created_at" in task:
-            try:
-                created_date = datetime.fromisoformat(task["created_at"]).date()
-                date_str = created_date.isoformat()
-                if date_str in date_data:
-                    date_data[date_str]["created"] += 1
-            except (ValueError, TypeError):
-                pass
-    
-    # Count completed tasks by date
-    for task in filtered_tasks:
-        if task.get("completed", False) and "completed_at" in task:
-            try:
-                completed_date = datetime.fromisoformat(task["completed_at"]).date()
-                date_str = completed_date.isoformat()
-                if date_str in date_data:
-                    date_data[date_str]["completed"] += 1
-            except (ValueError, TypeError):
-                pass
+    # Count created and completed tasks per day over every day in the range, zero-filling days without any
+    days = pd.date_range(start_date, end_date, freq="D")
+    created_per_day = filtered_tasks_df["created_dt"].dt.normalize().value_counts().reindex(days, fill_value=0)
+    completed_per_day = (
+        filtered_tasks_df.loc[filtered_tasks_df["completed"], "completed_dt"]
+        .dt.normalize()
+        .value_counts()
+        .reindex(days, fill_value=0)
+    )
     
-    # Convert to dataframe
-    df = pd.DataFrame([
-        {"date": date, "metric": "Created", "count": data["created"]}
-        for date, data in date_data.items()
-    ] + [
-        {"date": date, "metric": "Completed", "count": data["completed"]}
-        for date, data in date_data.items()
-    ])
+    # Convert to long-format dataframe: every Created row, then every Completed row
+    df = (
+        pd.concat([created_per_day.rename("Created"), completed_per_day.rename("Completed")], axis=1)
+        .set_axis(days.strftime("%Y-%m-%d"))
+        .rename_axis("date")
+        .reset_index()
+        .melt(id_vars="date", var_name="metric", value_name="count")
+    )
     
     # Create chart
     if not df.empty:
@@ -529,22 +459,19 @@ with tab2:
     # Task distribution by importance and urgency
     st.subheader("Task Distribution by Importance and Urgency")
     
-    # Prepare data
-    importance_urgency_data = {}
-    for i in range(1, 6):
-        for j in range(1, 6):
-            importance_urgency_data[(i, j)] = 0
-    
-    for task in filtered_tasks:
-        importance = task.get("importance", 3)
-        urgency = task.get("urgency", 3)
-        importance_urgency_data[(importance, urgency)] += 1
-    
-    # Convert to dataframe
-    df = pd.DataFrame([
-        {"importance": imp, "urgency": urg, "count": count}
-        for (imp, urg), count in importance_urgency_data.items()
-    ])
+    # Count the tasks in each importance/urgency cell of the 5x5 grid in one scatter-add
+    importance = filtered_tasks_df["importance"].to_numpy().clip(1, 5) - 1
+    urgency = filtered_tasks_df["urgency"].to_numpy().clip(1, 5) - 1
+    counts = np.zeros((5, 5), dtype=np.int64)
+    np.add.at(counts, (importance, urgency), 1)
+    
+    # Convert to dataframe, one row per cell
+    df = (
+        pd.DataFrame(counts, index=range(1, 6), columns=range(1, 6))
+        .stack()
+        .rename_axis(["importance", "urgency"])
+        .reset_index(name="count")
+    )
     
     if not df.empty:
         fig = px.density_heatmap(
@@ -569,42 +496,9 @@ with tab2:
 with tab3:
     st.subheader("Goals & Habits Analysis")
     
-    # Filter goals and habits based on date range
-    filtered_goals = []
-    for goal in st.session_state.get("goals", []):
-        # Check if created_at is within date range
-        if "created_at" in goal:
-            try:
-                created_date = datetime.fromisoformat(goal["created_at"]).date()
-                if start_date <= created_date <= end_date:
-                    # Apply category filter
-                    if not category_filter or goal.get("category_id") in category_filter:
-                        filtered_goals.append(goal)
-            except (ValueError, TypeError):
-                pass
-    
-    filtered_habits = []
-    for habit in st.session_state.get("habits", []):
-        # Include habits with check-ins within date range
-        if "check_ins" in habit:
-            habit_in_range = False
-            filtered_checkins = []
-            
-            for check_in in habit["check_ins"]:
-                try:
-                    check_date = datetime.fromisoformat(check_in).date()
-                    if start_date <= check_date <= end_date:
-                        habit_in_range = True
-                        filtered_checkins.append(check_in)
-                except (ValueError, TypeError):
-                    pass
-            
-            if habit_in_range:
-                # Apply category filter
-                if not category_filter or habit.get("category_id") in category_filter:
-                    habit_copy = habit.copy()
-                    habit_copy["check_ins"] = filtered_checkins
-                    filtered_habits.append(habit_copy)
+    filtered_goals = filtered_data["goals"]
+    filtered_goals_df = filtered_data["goals_df"]
+    filtered_habits = filtered_data["habits"]
     
     # Goals progress chart
     progress_chart = goal_progress_chart(filtered_goals)
@@ -623,40 +517,16 @@ with tab3:
     
     # Create combined heatmap for all habits
     if filtered_habits:
-        # Aggregate all check-ins
-        all_checkins = []
-        for habit in filtered_habits:
-            all_checkins.extend(habit.get("check_ins", []))
-        
-        # Count check-ins per day
-        checkin_counts = {}
-        for checkin in all_checkins:
-            try:
-                check_date = datetime.fromisoformat(checkin).date()
-                date_str = check_date.isoformat()
-                if date_str not in checkin_counts:
-                    checkin_counts[date_str] = 0
-                checkin_counts[date_str] += 1
-            except (ValueError, TypeError):
-                pass
-        
-        # Create date range
-        date_range = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_range.append(current_date)
-            current_date += timedelta(days=1)
+        # Count check-ins per day over every day in the range
+        days = pd.date_range(start_date, end_date, freq="D")
+        checkin_counts = filtered_data["check_ins_df"]["check_in_dt"].dt.normalize().value_counts().reindex(days, fill_value=0)
         
         # Create dataframe
-        df = pd.DataFrame([
-            {
-                "date": date,
-                "count": checkin_counts.get(date.isoformat(), 0),
-                "weekday": date.strftime("%a"),
-                "week": date.isocalendar()[1]
-            }
-            for date in date_range
-        ])
+        df = pd.DataFrame({
+            "date": days.date,
+            "count": checkin_counts.to_numpy(),
+            "weekday": days.strftime("%a")
+        })
         
         if not df.empty:
             fig = go.Figure(data=go.Heatmap(
@@ -678,27 +548,19 @@ with tab3:
     # Goals completion time analysis
     st.subheader("Goal Completion Time Analysis")
     
-    completed_goals = [goal for goal in filtered_goals if goal.get("completed", False)]
-    
-    if completed_goals:
-        completion_times = []
-        for goal in completed_goals:
-            if "created_at" in goal and "completed_at" in goal:
-                try:
-                    created = datetime.fromisoformat(goal["created_at"])
-                    completed = datetime.fromisoformat(goal["completed_at"])
-                    days_to_complete = (completed - created).days
-                    
-                    completion_times.append({
-                        "goal": goal["title"],
-                        "days": days_to_complete,
-                        "category_id": goal.get("category_id")
-                    })
-                except (ValueError, TypeError):
-                    pass
-        
-        if completion_times:
-            df = pd.DataFrame(completion_times)
+    completed_goals_df = filtered_goals_df[filtered_goals_df["completed"]]
+    
+    if not completed_goals_df.empty:
+        completion_times = completed_goals_df.loc[
+            completed_goals_df["created_dt"].notna() & completed_goals_df["completed_dt"].notna()
+        ]
+        
+        if not completion_times.empty:
+            df = pd.DataFrame({
+                "goal": completion_times["title"].to_numpy(),
+                "days": (completion_times["completed_dt"] - completion_times["created_dt"]).dt.days.to_numpy(),
+                "category_id": completion_times["category_id"].to_numpy()
+            })
             
             # Add category information
             df["category"] = df["category_id"].apply(
@@ -740,67 +602,28 @@ with tab3:
 with tab4:
     st.subheader("Time Management Analysis")
     
-    # Filter calendar events based on date range
-    filtered_events = []
-    for event in st.session_state.get("calendar_events", []):
-        # Check if start_time is within date range
-        if "start_time" in event and "end_time" in event:
-            try:
-                start_time = datetime.fromisoformat(event["start_time"])
-                end_time = datetime.fromisoformat(event["end_time"])
-                
-                # Check if event falls within date range
-                event_start_date = start_time.date()
-                event_end_date = end_time.date()
-                
-                if (start_date <= event_start_date <= end_date) or \
-                   (start_date <= event_end_date <= end_date) or \
-                   (event_start_date <= start_date and event_end_date >= end_date):
-                    # Apply category filter
-                    if not category_filter or event.get("category_id") in category_filter:
-                        filtered_events.append(event)
-            except (ValueError, TypeError):
-                pass
+    # Events that start, end or span the date range
+    filtered_events = filtered_data["overlapping_events"]
+    filtered_events_df = filtered_data["overlapping_events_df"]
     
     # Time distribution by category
     dist_chart = time_distribution_chart(filtered_events, categories)
     if dist_chart:
-        st.plotly_chart(dist_chart, use_container_width=True)
+        st.plotly_chart(dist_chart, use_container_width=True, key="time_management_distribution_chart")
     
     # Calculate time spent per day
     st.subheader("Time Allocated Per Day")
     
     if filtered_events:
-        # Calculate hours per day
-        day_hours = {}
-        for event in filtered_events:
-            try:
-                start_time = datetime.fromisoformat(event["start_time"])
-                end_time = datetime.fromisoformat(event["end_time"])
-                
-                event_date = start_time.date()
-                date_str = event_date.isoformat()
-                
-                if start_date <= event_date <= end_date:
-                    if date_str not in day_hours:
-                        day_hours[date_str] = 0
-                    
-                    # Calculate duration in hours
-                    duration = (end_time - start_time).total_seconds() / 3600
-                    day_hours[date_str] += duration
-            except (ValueError, TypeError):
-                pass
+        # Calculate hours per day, counting each event on the day it starts
+        event_days = filtered_events_df["start_dt"].dt.normalize()
+        in_range = filtered_events_df[event_days.between(range_start, range_end)]
+        durations = (in_range["end_dt"] - in_range["start_dt"]).dt.total_seconds() / 3600
+        day_hours = durations.groupby(in_range["start_dt"].dt.normalize()).sum()
         
-        if day_hours:
-            # Create dataframe
-            df = pd.DataFrame([
-                {"date": date, "hours": hours}
-                for date, hours in day_hours.items()
-            ])
-            
-            # Sort by date
-            df["date"] = pd.to_datetime(df["date"])
-            df = df.sort_values("date")
+        if not day_hours.empty:
+            # Create dataframe, sorted by date
+            df = pd.DataFrame({"date": day_hours.index, "hours": day_hours.to_numpy()})
             
             # Create chart
             chart = alt.Chart(df).mark_bar().encode(
@@ -829,21 +652,14 @@ with tab4:
     st.subheader("Time Allocation by Hour of Day")
     
     if filtered_events:
-        # Count events by hour of day
-        hour_counts = {hour: 0 for hour in range(24)}
+        # Count every hour slot each event spans, from the hour it starts in up to its end
+        first_hours = filtered_events_df["start_dt"].dt.floor("h")
+        slot_counts = np.ceil((filtered_events_df["end_dt"] - first_hours) / pd.Timedelta(hours=1)).clip(lower=0).to_numpy(dtype=np.int64)
         
-        for event in filtered_events:
-            try:
-                start_time = datetime.fromisoformat(event["start_time"])
-                end_time = datetime.fromisoformat(event["end_time"])
-                
-                # Count all hours this event spans
-                current_hour = start_time.replace(minute=0, second=0, microsecond=0)
-                while current_hour < end_time:
-                    hour_counts[current_hour.hour] += 1
-                    current_hour += timedelta(hours=1)
-            except (ValueError, TypeError):
-                pass
+        # Expand to one entry per slot: each event's first hour plus 0, 1, 2, ... slots
+        slot_offsets = np.arange(slot_counts.sum()) - np.repeat(np.cumsum(slot_counts) - slot_counts, slot_counts)
+        slot_hours = (np.repeat(first_hours.dt.hour.to_numpy(), slot_counts) + slot_offsets) % 24
+        hour_counts = dict(enumerate(np.bincount(slot_hours, minlength=24).tolist()))
         
         # Create dataframe
         df = pd.DataFrame([
@@ -867,7 +683,7 @@ with tab4:
             ticktext=[f"{h%12 if h%12 else 12} {'AM' if h<12 else 'PM'}" for h in range(24)]
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="events_by_hour_chart")
         
         # Find peak hours
         busy_hours = sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:3]
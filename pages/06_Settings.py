@@ -8,6 +8,7 @@ from utils.data_manager import (
     initialize_session_state,
     save_user_data,
     load_user_data,
+    set_priority_fields,
     add_category,
     update_category,
     delete_category
@@ -428,6 +429,8 @@ with tab4:
                     # Update session state with imported data
                     for key in required_keys:
                         st.session_state[key] = import_data[key]
+                    for task in st.session_state["tasks"]:
+                        set_priority_fields(task)
                     
                     # Save data
                     save_user_data()
@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 import json
 import os
 import requests
+import calendar
+from functools import lru_cache
 
 # Google Calendar API helpers
 def get_google_auth_url():
@@ -33,11 +35,23 @@ def refresh_google_token(refresh_token):
         "expires_at": (datetime.now() + timedelta(hours=1)).isoformat()
     }
 
-def sync_events_from_google(access_token, start_date=None, end_date=None):
-    """Sync events from Google Calendar to the app"""
+def sync_events_from_google(access_token, start_date=None, end_date=None, sync_token=None):
+    """Sync events from Google Calendar to the app
+    
+    Returns (events, next_sync_token, deleted_event_ids). Passing the token from the previous
+    sync returns only what changed since then; if the token was rejected, events and
+    next_sync_token are None.
+    """
     # This is a placeholder for actual Google Calendar API calls
     # In a full implementation, you would make API requests to:
     # https://www.googleapis.com/calendar/v3/calendars/primary/events
+    # sending syncToken=sync_token when one is given, reading nextSyncToken from the last page
+    # and the IDs of items with status "cancelled" as deletions. A 410 Gone response means the
+    # token expired; return (None, None, []) so the caller falls back to a full sync.
+    
+    if sync_token:
+        # The example calendar never changes, so an incremental sync has nothing new
+        return [], sync_token, []
     
     # Example events data
     example_events = [
@@ -61,7 +75,7 @@ def sync_events_from_google(access_token, start_date=None, end_date=None):
         }
     ]
     
-    return example_events
+    return example_events, "placeholder_sync_token", []
 
 def push_event_to_google(access_token, event):
     """Push an event from the app to Google Calendar"""
@@ -148,123 +162,7 @@ def export_to_ics_calendar(events):
     return ics_content
 
 # Calendar view generation helpers
-def generate_month_view(year, month, events=None):
-    """Generate data for a month view calendar"""
-    import calendar
-    
-    # Get the month calendar
-    cal = calendar.monthcalendar(year, month)
-    
-    # Prepare data structure for the month view
-    month_data = {
-        "year": year,
-        "month": month,
-        "month_name": calendar.month_name[month],
-        "weeks": []
-    }
-    
-    # Process each week
-    for week in cal:
-        week_data = []
-        
-        for day in week:
-            if day == 0:
-                # Day outside the month
-                week_data.append({"day": None, "events": []})
-            else:
-                # Construct the date for this day
-                day_date = datetime(year, month, day).date()
-                
-                # Find events for this day
-                day_events = []
-                if events:
-                    for event in events:
-                        try:
-                            event_start = datetime.fromisoformat(event["start_time"]).date()
-                            if event_start == day_date:
-                                day_events.append(event)
-                        except (ValueError, TypeError):
-                            # Skip events with invalid datetime format
-                            continue
-                
-                week_data.append({"day": day, "events": day_events})
-        
-        month_data["weeks"].append(week_data)
-    
-    return month_data
-
-def generate_week_view(year, week_num, events=None):
-    """Generate data for a week view calendar"""
-    import datetime as dt
-    
-    # Find the first day of the week
-    first_day = dt.datetime.strptime(f'{year}-W{week_num}-1', '%Y-W%W-%w').date()
-    
-    # Generate the week days
-    week_days = [first_day + dt.timedelta(days=i) for i in range(7)]
-    
-    # Prepare data structure for the week view
-    week_data = {
-        "year": year,
-        "week_num": week_num,
-        "days": []
-    }
-    
-    # Process each day
-    for day in week_days:
-        day_data = {
-            "date": day,
-            "events": []
-        }
-        
-        # Find events for this day
-        if events:
-            for event in events:
-                try:
-                    event_start = datetime.fromisoformat(event["start_time"]).date()
-                    if event_start == day:
-                        day_data["events"].append(event)
-                except (ValueError, TypeError):
-                    # Skip events with invalid datetime format
-                    continue
-        
-        week_data["days"].append(day_data)
-    
-    return week_data
-
-def generate_day_view(date, events=None):
-    """Generate data for a day view calendar"""
-    # Prepare data structure for the day view
-    day_data = {
-        "date": date,
-        "hours": []
-    }
-    
-    # Generate hours from 0 to 23
-    for hour in range(24):
-        hour_data = {
-            "hour": hour,
-            "events": []
-        }
-        
-        # Find events for this hour
-        if events:
-            for event in events:
-                try:
-                    event_start = datetime.fromisoformat(event["start_time"])
-                    event_end = datetime.fromisoformat(event["end_time"])
-                    
-                    # Check if the event starts or spans this hour
-                    hour_start = datetime.combine(date, datetime.min.time()) + timedelta(hours=hour)
-                    hour_end = hour_start + timedelta(hours=1)
-                    
-                    if (hour_start <= event_start < hour_end) or \
-                       (event_start <= hour_start and event_end > hour_start):
-                        hour_data["events"].append(event)
-                except (ValueError, TypeError):
-                    # Skip events with invalid datetime format
-                    continue
-        
-        day_data["hours"].append(hour_data)
-    
-    return day_data
+@lru_cache(maxsize=128)
+def month_weeks(year, month):
+    """Weeks of a month (Monday first) as tuples of day numbers, 0 for days outside the month"""
+    return tuple(tuple(week) for week in calendar.monthcalendar(year, month))
@@ -1,13 +1,24 @@
 import streamlit as st
+import numpy as np
+import pandas as pd
 import json
 import os
 from datetime import datetime, timedelta
 import uuid
+import warnings
 
 # Data files
 DATA_DIR = "data"
 USER_DATA_FILE = os.path.join(DATA_DIR, "user_data.json")
 
+# Collections persisted in the user data file
+DATA_KEYS = ("user_profile", "categories", "tasks", "goals", "habits", "calendar_events",
+             "points", "rewards", "unlocked_rewards")
+
+# Calendar event form state; an empty string means "not editing" / "use the form default"
+EVENT_EDIT_KEYS = ("edit_event_id", "edit_event_title", "edit_event_description", "edit_event_location",
+                   "edit_event_category", "edit_event_date", "edit_event_start_time", "edit_event_end_time")
+
 def ensure_data_dir():
     """Ensure the data directory exists"""
     if not os.path.exists(DATA_DIR):
@@ -23,6 +34,8 @@ def initialize_session_state():
             # Set session state from loaded data
             for key, value in user_data.items():
                 st.session_state[key] = value
+            for task in st.session_state.get("tasks", []):
+                set_priority_fields(task)
             st.session_state["first_time"] = False
         else:
             # Default session state for new users
@@ -38,11 +51,270 @@ def initialize_session_state():
             st.session_state["unlocked_rewards"] = []
         
         st.session_state["initialized"] = True
+    
+    # Outside the guard so sessions initialized before these keys existed get them too
+    for key in EVENT_EDIT_KEYS:
+        st.session_state.setdefault(key, "")
+
+def get_data_version(key):
+    """Return the counter that is bumped every time the given collection is saved"""
+    return st.session_state.get("_data_versions", {}).get(key, 0)
+
+def get_session_cached(state_key, cache_key, build):
+    """Return build() memoized in session state until cache_key changes"""
+    cached = st.session_state.get(state_key)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    
+    value = build()
+    st.session_state[state_key] = (cache_key, value)
+    return value
+
+def get_categories_by_id():
+    """Return a dict mapping category IDs to categories, rebuilt only after data changes"""
+    return get_session_cached(
+        "_categories_by_id",
+        get_data_version("categories"),
+        lambda: {c["id"]: c for c in st.session_state.get("categories", [])}
+    )
+
+def get_category_ids_by_name():
+    """Return a dict mapping category names to IDs (first category wins), rebuilt only after data changes"""
+    return get_session_cached(
+        "_category_ids_by_name",
+        get_data_version("categories"),
+        lambda: {c["name"]: c["id"] for c in reversed(st.session_state.get("categories", []))}
+    )
+
+def get_category_index_by_id():
+    """Return a dict mapping category IDs to their position in the categories list, for selectbox defaults"""
+    return get_session_cached(
+        "_category_index_by_id",
+        get_data_version("categories"),
+        lambda: {c["id"]: i for i, c in reversed(list(enumerate(st.session_state.get("categories", []))))}
+    )
+
+def get_habit_check_ins():
+    """Return a dict mapping habit IDs to a frozenset of their check-in dates, rebuilt only after data changes"""
+    return get_session_cached(
+        "_habit_check_ins",
+        get_data_version("habits"),
+        lambda: {h["id"]: frozenset(h.get("check_ins", ())) for h in st.session_state.get("habits", [])}
+    )
+
+def get_habits_by_id():
+    """Return a dict mapping habit IDs to habits, rebuilt only after data changes"""
+    return get_session_cached(
+        "_habits_by_id",
+        get_data_version("habits"),
+        lambda: {h["id"]: h for h in st.session_state.get("habits", [])}
+    )
+
+def get_habits_by_streak():
+    """Return the habits sorted by current streak (longest first), rebuilt only after data changes"""
+    return get_session_cached(
+        "_habits_by_streak",
+        get_data_version("habits"),
+        lambda: sorted(st.session_state.get("habits", []), key=lambda h: h.get("current_streak", 0), reverse=True)
+    )
+
+def _build_tasks_df(tasks):
+    """Build a column-oriented view of the tasks; row i corresponds to tasks[i]"""
+    importance = [task.get("importance", 1) for task in tasks]
+    urgency = [task.get("urgency", 1) for task in tasks]
+    
+    df = pd.DataFrame({
+        "id": [task["id"] for task in tasks],
+        "title": [task.get("title", "") for task in tasks],
+        "category_id": [task.get("category_id") for task in tasks],
+        "due_date": pd.to_datetime([task.get("due_date") for task in tasks], format="ISO8601", errors="coerce"),
+        "created_dt": _parse_timestamps([task.get("created_at") for task in tasks]),
+        "completed_dt": _parse_timestamps([task.get("completed_at") for task in tasks]),
+        "completed": pd.Series([bool(task.get("completed", False)) for task in tasks], dtype="bool"),
+        "importance": pd.Series(importance, dtype="int8"),
+        "urgency": pd.Series(urgency, dtype="int8"),
+    })
+    df["score"] = df["importance"].astype("int16") * df["urgency"].astype("int16")
+    
+    return df
+
+def get_tasks_df():
+    """Return the tasks as a cached DataFrame, rebuilt only after data changes"""
+    return get_session_cached(
+        "_tasks_df",
+        get_data_version("tasks"),
+        lambda: _build_tasks_df(st.session_state.get("tasks", []))
+    )
+
+def get_task_due_dates():
+    """Return {task_id: (due date, "YYYY-MM-DD")} for tasks that have a due date.
+    
+    Parsed once per tasks version, so renders don't call fromisoformat per task.
+    """
+    def build():
+        df = get_tasks_df()
+        due = df.loc[df["due_date"].notna(), ["id", "due_date"]]
+        return {
+            task_id: (ts.date(), ts.strftime("%Y-%m-%d"))
+            for task_id, ts in zip(due["id"], due["due_date"])
+        }
+    
+    return get_session_cached("_task_due_dates", get_data_version("tasks"), build)
+
+class TaskStore:
+    """Struct-of-arrays view of the tasks: one NumPy array per field, row i is tasks[i]"""
+    
+    def __init__(self, df):
+        self.ids = df["id"].to_numpy(dtype=object)
+        self.titles = df["title"].to_numpy(dtype=object)
+        self.category_ids = df["category_id"].to_numpy(dtype=object)
+        self.due_dates = df["due_date"].to_numpy(dtype="datetime64[ns]")
+        self.due_days = self.due_dates.astype("datetime64[D]")
+        self.completed = df["completed"].to_numpy(dtype=bool)
+        self.completed_count = int(np.count_nonzero(self.completed))
+        self.importance = df["importance"].to_numpy(dtype=np.int8)
+        self.urgency = df["urgency"].to_numpy(dtype=np.int8)
+        self.scores = df["score"].to_numpy(dtype=np.int16)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def today_mask(self, today):
+        """Boolean mask of the tasks due on the given date"""
+        return self.due_days == np.datetime64(today, "D")
+    
+    def rows_by_priority(self, mask=None):
+        """Row indices ordered by descending score (ties keep list order)"""
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        return rows[np.argsort(-self.scores[rows], kind="stable")]
+    
+    def top_n_priority(self, n, mask=None):
+        """Row indices of the n highest-scoring tasks"""
+        return self.rows_by_priority(mask)[:n]
+    
+    def completion_rate(self):
+        """Fraction of tasks that are completed"""
+        return self.completed_count / len(self) if len(self) else 0.0
+
+def get_task_store():
+    """Return the cached TaskStore, rebuilt only after data changes"""
+    return get_session_cached(
+        "_task_store",
+        get_data_version("tasks"),
+        lambda: TaskStore(get_tasks_df())
+    )
+
+def _wall_clock_time(value):
+    """Parse one ISO timestamp to a naive datetime, or None if it isn't valid"""
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (ValueError, TypeError):
+        return None
+
+def _parse_timestamps(values):
+    """Parse ISO timestamps into naive wall-clock datetimes; invalid values become NaT"""
+    try:
+        with warnings.catch_warnings():
+            # pandas 2.x warns about mixed UTC offsets and returns an object Index (handled below)
+            warnings.simplefilter("ignore", FutureWarning)
+            parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    except (ValueError, TypeError):
+        parsed = None
+    if not isinstance(parsed, pd.DatetimeIndex):
+        # Timestamps with different UTC offsets can't share a column, so parse them one by one
+        return pd.to_datetime([_wall_clock_time(value) for value in values])
+    return parsed.tz_localize(None) if parsed.tz is not None else parsed
+
+def _build_events_df(events):
+    """Build a column-oriented view of the calendar events; row i corresponds to events[i]"""
+    df = pd.DataFrame({
+        "id": [event.get("id") for event in events],
+        "category_id": pd.Series([event.get("category_id") for event in events], dtype="object"),
+        "start_dt": _parse_timestamps([event.get("start_time") for event in events]),
+        "end_dt": _parse_timestamps([event.get("end_time") for event in events]),
+    })
+    # Events missing a valid start or end are shown as "All day", and their labels say so
+    df["all_day"] = df["start_dt"].isna() | df["end_dt"].isna()
+    df["start_label"] = df["start_dt"].dt.strftime("%H:%M").fillna("All day")
+    df["end_label"] = df["end_dt"].dt.strftime("%H:%M").fillna("All day")
+    
+    return df
+
+def get_events_df():
+    """Return the calendar events as a cached DataFrame with parsed start and end times"""
+    return get_session_cached(
+        "_events_df",
+        get_data_version("calendar_events"),
+        lambda: _build_events_df(st.session_state.get("calendar_events", []))
+    )
+
+def _build_goals_df(goals):
+    """Build a column-oriented view of the goals; row i corresponds to goals[i]"""
+    return pd.DataFrame({
+        "id": [goal.get("id") for goal in goals],
+        "title": [goal.get("title", "") for goal in goals],
+        "category_id": pd.Series([goal.get("category_id") for goal in goals], dtype="object"),
+        "completed": pd.Series([bool(goal.get("completed", False)) for goal in goals], dtype="bool"),
+        "target_date": pd.Series([goal.get("target_date") for goal in goals], dtype="object"),
+        "target_dt": _parse_timestamps([goal.get("target_date") for goal in goals]),
+        "progress": pd.Series([goal.get("progress", 0) for goal in goals], dtype="float64"),
+        "created_dt": _parse_timestamps([goal.get("created_at") for goal in goals]),
+        "completed_dt": _parse_timestamps([goal.get("completed_at") for goal in goals]),
+    })
 
-def save_user_data():
-    """Save user data to file"""
+def get_goals_df():
+    """Return the goals as a cached DataFrame, rebuilt only after data changes"""
+    return get_session_cached(
+        "_goals_df",
+        get_data_version("goals"),
+        lambda: _build_goals_df(st.session_state.get("goals", []))
+    )
+
+def _build_check_ins_df(habits):
+    """Build one row per habit check-in; the habit column is the habit's position in the habits list"""
+    df = pd.DataFrame(
+        [(i, check_in) for i, habit in enumerate(habits) for check_in in habit.get("check_ins", [])],
+        columns=["habit", "check_in"]
+    )
+    df["check_in_dt"] = _parse_timestamps(df["check_in"].tolist())
+    
+    return df
+
+def get_check_ins_df():
+    """Return every habit check-in as a cached DataFrame with parsed dates"""
+    return get_session_cached(
+        "_check_ins_df",
+        get_data_version("habits"),
+        lambda: _build_check_ins_df(st.session_state.get("habits", []))
+    )
+
+def get_earliest_created_date():
+    """Return the earliest created_at date across tasks, goals and habits, or None if none is valid"""
+    collections = ("tasks", "goals", "habits")
+
+    def build():
+        created = _parse_timestamps([
+            item.get("created_at")
+            for key in collections
+            for item in st.session_state.get(key, [])
+        ])
+        return created.min().date() if created.notna().any() else None
+
+    return get_session_cached(
+        "_earliest_created_date",
+        tuple(get_data_version(key) for key in collections),
+        build
+    )
+
+def save_user_data(*changed):
+    """Save user data to file; changed names the modified collections (default: all)"""
     ensure_data_dir()
     
+    # Invalidate anything derived from the previous data
+    versions = st.session_state.setdefault("_data_versions", {})
+    for key in changed or DATA_KEYS:
+        versions[key] = versions.get(key, 0) + 1
+    
     user_data = {
         "user_profile": st.session_state.get("user_profile", {}),
         "categories": st.session_state.get("categories", []),
@@ -55,8 +327,20 @@ def save_user_data():
         "unlocked_rewards": st.session_state.get("unlocked_rewards", [])
     }
     
-    with open(USER_DATA_FILE, 'w') as f:
-        json.dump(user_data, f, indent=2)
+    payload = json.dumps(user_data, indent=2)
+    
+    # Skip the disk write when nothing persisted has changed since this session's last save
+    if payload == st.session_state.get("_last_saved_payload") and os.path.exists(USER_DATA_FILE):
+        return
+    
+    # Write to a temporary file first so a failed write never truncates the data file
+    tmp_file = USER_DATA_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, USER_DATA_FILE)
+    st.session_state["_last_saved_payload"] = payload
 
 def load_user_data():
     """Load user data from file"""
@@ -69,6 +353,22 @@ def load_user_data():
     except (json.JSONDecodeError, FileNotFoundError):
         return None
 
+# Priority label for every possible importance * urgency score (1-5 each)
+PRIORITY_LABELS = tuple(
+    "Low" if score < 6 else "Medium" if score < 12 else "High" if score < 20 else "Critical"
+    for score in range(26)
+)
+
+def priority_label_for(score):
+    """Return the priority label for an importance * urgency score"""
+    return PRIORITY_LABELS[max(0, min(25, score))]
+
+def set_priority_fields(task):
+    """Store the task's priority score and label so renders and sorts don't recompute them"""
+    score = task.get("importance", 1) * task.get("urgency", 1)
+    task["priority_score"] = score
+    task["priority_label"] = priority_label_for(score)
+
 def add_task(title, description="", category_id=None, due_date=None, importance=3, urgency=3):
     """Add a new task to the session state"""
     if not category_id and st.session_state.get("categories"):
@@ -85,12 +385,13 @@ def add_task(title, description="", category_id=None, due_date=None, importance=
         "importance": importance,
         "urgency": urgency
     }
+    set_priority_fields(new_task)
     
     if "tasks" not in st.session_state:
         st.session_state["tasks"] = []
         
     st.session_state["tasks"].append(new_task)
-    save_user_data()
+    save_user_data("tasks")
     return new_task
 
 def update_task(task_id, **kwargs):
@@ -102,8 +403,9 @@ def update_task(task_id, **kwargs):
         if task["id"] == task_id:
             for key, value in kwargs.items():
                 task[key] = value
+            set_priority_fields(task)
             st.session_state["tasks"][i] = task
-            save_user_data()
+            save_user_data("tasks")
             return True
     
     return False
@@ -117,7 +419,7 @@ def delete_task(task_id):
     st.session_state["tasks"] = [task for task in st.session_state["tasks"] if task["id"] != task_id]
     
     if initial_count != len(st.session_state["tasks"]):
-        save_user_data()
+        save_user_data("tasks")
         return True
     
     return False
@@ -154,7 +456,7 @@ def add_goal(title, description="", target_date=None, category_id=None, mileston
         st.session_state["goals"] = []
         
     st.session_state["goals"].append(new_goal)
-    save_user_data()
+    save_user_data("goals")
     return new_goal
 
 def update_goal(goal_id, **kwargs):
@@ -167,7 +469,7 @@ def update_goal(goal_id, **kwargs):
             for key, value in kwargs.items():
                 goal[key] = value
             st.session_state["goals"][i] = goal
-            save_user_data()
+            save_user_data("goals")
             return True
     
     return False
@@ -181,7 +483,7 @@ def delete_goal(goal_id):
     st.session_state["goals"] = [goal for goal in st.session_state["goals"] if goal["id"] != goal_id]
     
     if initial_count != len(st.session_state["goals"]):
-        save_user_data()
+        save_user_data("goals")
         return True
     
     return False
@@ -218,7 +520,7 @@ def add_habit(title, description="", frequency="daily", category_id=None):
         st.session_state["habits"] = []
         
     st.session_state["habits"].append(new_habit)
-    save_user_data()
+    save_user_data("habits")
     return new_habit
 
 def check_in_habit(habit_id, date=None):
@@ -252,9 +554,9 @@ def check_in_habit(habit_id, date=None):
             most_recent = sorted_check_ins[-1].date()
             
             if most_recent == check_in_date:  # If today's check-in is the most recent
-                for i in range(1, len(sorted_check_ins)):
-                    prev_date = sorted_check_ins[-i-1].date()
-                    curr_date = sorted_check_ins[-i].date()
+                for j in range(1, len(sorted_check_ins)):
+                    prev_date = sorted_check_ins[-j-1].date()
+                    curr_date = sorted_check_ins[-j].date()
                     
                     # Check if dates are consecutive
                     if (curr_date - prev_date).days == 1:
@@ -268,7 +570,7 @@ def check_in_habit(habit_id, date=None):
             
             # Save changes
             st.session_state["habits"][i] = habit
-            save_user_data()
+            save_user_data("habits")
             
             # Award points for habit check-in
             award_points(5)
@@ -286,17 +588,17 @@ def delete_habit(habit_id):
     st.session_state["habits"] = [habit for habit in st.session_state["habits"] if habit["id"] != habit_id]
     
     if initial_count != len(st.session_state["habits"]):
-        save_user_data()
+        save_user_data("habits")
         return True
     
     return False
 
-def add_calendar_event(title, start_time, end_time, category_id=None, description="", location=""):
-    """Add a new calendar event to the session state"""
+def _new_calendar_event(title, start_time, end_time, category_id=None, description="", location=""):
+    """Build a calendar event dict, defaulting to the first category"""
     if not category_id and st.session_state.get("categories"):
         category_id = st.session_state["categories"][0]["id"]
         
-    new_event = {
+    return {
         "id": str(uuid.uuid4()),
         "title": title,
         "description": description,
@@ -306,14 +608,42 @@ def add_calendar_event(title, start_time, end_time, category_id=None, descriptio
         "end_time": end_time.isoformat() if isinstance(end_time, datetime) else end_time,
         "created_at": datetime.now().isoformat()
     }
+
+def add_calendar_event(title, start_time, end_time, category_id=None, description="", location=""):
+    """Add a new calendar event to the session state"""
+    new_event = _new_calendar_event(title, start_time, end_time, category_id, description, location)
     
     if "calendar_events" not in st.session_state:
         st.session_state["calendar_events"] = []
         
     st.session_state["calendar_events"].append(new_event)
-    save_user_data()
+    save_user_data("calendar_events")
     return new_event
 
+def add_calendar_events_bulk(events):
+    """Add several calendar events (dicts with add_calendar_event's fields) and save once"""
+    new_events = [
+        _new_calendar_event(
+            title=event["title"],
+            start_time=event["start_time"],
+            end_time=event["end_time"],
+            category_id=event.get("category_id"),
+            description=event.get("description", ""),
+            location=event.get("location", "")
+        )
+        for event in events
+    ]
+    
+    if not new_events:
+        return new_events
+    
+    if "calendar_events" not in st.session_state:
+        st.session_state["calendar_events"] = []
+        
+    st.session_state["calendar_events"].extend(new_events)
+    save_user_data("calendar_events")
+    return new_events
+
 def update_calendar_event(event_id, **kwargs):
     """Update a calendar event with new values"""
     if "calendar_events" not in st.session_state:
@@ -324,7 +654,7 @@ def update_calendar_event(event_id, **kwargs):
             for key, value in kwargs.items():
                 event[key] = value
             st.session_state["calendar_events"][i] = event
-            save_user_data()
+            save_user_data("calendar_events")
             return True
     
     return False
@@ -338,7 +668,7 @@ def delete_calendar_event(event_id):
     st.session_state["calendar_events"] = [event for event in st.session_state["calendar_events"] if event["id"] != event_id]
     
     if initial_count != len(st.session_state["calendar_events"]):
-        save_user_data()
+        save_user_data("calendar_events")
         return True
     
     return False
@@ -356,7 +686,7 @@ def add_category(name, color="#808080"):
         st.session_state["categories"] = []
         
     st.session_state["categories"].append(new_category)
-    save_user_data()
+    save_user_data("categories")
     return new_category
 
 def update_category(category_id, **kwargs):
@@ -369,7 +699,7 @@ def update_category(category_id, **kwargs):
             for key, value in kwargs.items():
                 category[key] = value
             st.session_state["categories"][i] = category
-            save_user_data()
+            save_user_data("categories")
             return True
     
     return False
@@ -383,7 +713,7 @@ def delete_category(category_id):
     st.session_state["categories"] = [category for category in st.session_state["categories"] if category["id"] != category_id]
     
     if initial_count != len(st.session_state["categories"]):
-        save_user_data()
+        save_user_data("categories")
         return True
     
     return False
@@ -394,7 +724,7 @@ def award_points(points):
         st.session_state["points"] = 0
         
     st.session_state["points"] += points
-    save_user_data()
+    save_user_data("points")
     
     # Check if any rewards should be unlocked
     check_for_unlockable_rewards()
@@ -416,7 +746,7 @@ def add_reward(title, description="", point_cost=100, reward_type="template"):
         st.session_state["rewards"] = []
         
     st.session_state["rewards"].append(new_reward)
-    save_user_data()
+    save_user_data("rewards")
     return new_reward
 
 def check_for_unlockable_rewards():
@@ -440,7 +770,7 @@ def check_for_unlockable_rewards():
             unlocked_reward["unlocked_at"] = datetime.now().isoformat()
             
             st.session_state["unlocked_rewards"].append(unlocked_reward)
-            save_user_data()
+            save_user_data("unlocked_rewards")
 
 def redeem_reward(reward_id):
     """Redeem a reward with points"""
@@ -479,5 +809,5 @@ def redeem_reward(reward_id):
                 st.session_state["unlocked_rewards"][i] = r
                 break
     
-    save_user_data()
+    save_user_data("points", "unlocked_rewards")
     return True
@@ -1,6 +1,4 @@
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
 from datetime import datetime, timedelta
 import streamlit as st
 import random
@@ -18,6 +16,10 @@ def train_classifier(tasks):
     if len(tasks) < 10:  # Not enough data for reliable training
         return None, None
     
+    # scikit-learn is slow to import, so only load it once a model is actually trained
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    
     # Extract task titles and categories
     X = [task["title"] for task in tasks]
     y = [task["category_id"] for task in tasks]
@@ -76,6 +78,22 @@ def classify_task(task_title, categories, existing_tasks=None):
     # If no matching keywords, return the first category as default
     return categories[0]["id"]
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_classify(task_title, category_sig, training_sig):
+    """Run classify_task on hashable category and training-task signatures"""
+    categories = [{"id": category_id, "name": name} for category_id, name in category_sig]
+    existing_tasks = [{"title": title, "category_id": category_id} for title, category_id in training_sig]
+    return classify_task(task_title, categories, existing_tasks)
+
+def cached_classify_task(task_title, categories, existing_tasks=None):
+    """Classify a task, reusing the result while the title, categories and existing tasks are unchanged"""
+    category_sig = tuple((category["id"], category["name"]) for category in categories or ())
+    # Fewer than 10 tasks are never used for training, so they don't need to be part of the key
+    training_sig = ()
+    if existing_tasks and len(existing_tasks) >= 10:
+        training_sig = tuple((task["title"], task["category_id"]) for task in existing_tasks)
+    return _cached_classify(task_title, category_sig, training_sig)
+
 def find_best_category_match(keyword_category, available_categories):
     """Find the closest matching category from available categories"""
     # Direct match
@@ -154,6 +172,15 @@ def estimate_task_parameters(task_title, task_description=""):
     
     return importance, urgency
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_estimate(task_title, task_description):
+    """Run estimate_task_parameters once per distinct title and description"""
+    return estimate_task_parameters(task_title, task_description)
+
+def cached_estimate_task_parameters(task_title, task_description=""):
+    """Estimate task importance and urgency, reusing the result for a repeated title and description"""
+    return _cached_estimate(task_title, task_description or "")
+
 def suggest_time_slot(task, user_profile, existing_events=None):
     """Suggest an optimal time slot for a task based on user preferences and existing schedule"""
     if not user_profile:
@@ -264,14 +291,15 @@ def get_next_tasks(tasks, top_n=3):
     # Filter incomplete tasks
     incomplete_tasks = [task for task in tasks if not task.get("completed", False)]
     
-    # Calculate priority score for each task
-    for task in incomplete_tasks:
-        importance = task.get("importance", 3)
-        urgency = task.get("urgency", 3)
-        task["priority_score"] = importance * urgency
+    # Calculate priority score for each task, decorated with its position so ties keep their order
+    keyed = []
+    for i, task in enumerate(incomplete_tasks):
+        score = task.get("importance", 3) * task.get("urgency", 3)
+        task["priority_score"] = score
+        keyed.append((-score, i))
     
     # Sort by priority score
-    sorted_tasks = sorted(incomplete_tasks, key=lambda x: x.get("priority_score", 0), reverse=True)
+    keyed.sort()
     
     # Return top N tasks
-    return sorted_tasks[:top_n]
+    return [incomplete_tasks[i] for _, i in keyed[:top_n]]
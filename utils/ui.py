@@ -15,8 +15,27 @@ def _load_css_content() -> str:
     return ""
 
 
-def inject_custom_css() -> None:
-    """Inject the shared CSS into the current Streamlit page."""
+@lru_cache(maxsize=None)
+def load_html_template(name: str) -> str:
+    """Read an HTML template from the assets folder once."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(base_dir, "assets", name), "r", encoding="utf-8") as template_file:
+        return template_file.read()
+
+
+@lru_cache(maxsize=1)
+def _style_block() -> str:
+    """Wrap the stylesheet in a <style> tag once per process."""
     css = _load_css_content()
-    if css:
-        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+    return f"<style>{css}</style>" if css else ""
+
+
+def inject_custom_css() -> None:
+    """Inject the shared CSS into the current Streamlit page.
+
+    The markup is built once, but it still has to be emitted on every rerun:
+    Streamlit drops elements that a run doesn't re-create.
+    """
+    style_block = _style_block()
+    if style_block:
+        st.markdown(style_block, unsafe_allow_html=True)
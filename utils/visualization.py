@@ -10,16 +10,25 @@ def task_completion_chart(tasks):
     if not tasks:
         return None
     
-    # Prepare the data
-    completed_tasks = [task for task in tasks if task.get("completed", False)]
+    # Reduce the completed tasks to their completion timestamps so the chart is only rebuilt when they change
+    completion_times = tuple(
+        task.get("completed_at", task.get("created_at"))
+        for task in tasks
+        if task.get("completed", False)
+    )
     
-    if not completed_tasks:
+    if not completion_times:
         return None
     
+    return _task_completion_figure(completion_times)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _task_completion_figure(completion_times):
+    """Build the task completion trend chart from the ISO completion timestamps"""
     # Group by completion date
     completion_dates = {}
-    for task in completed_tasks:
-        completion_date = datetime.fromisoformat(task.get("completed_at", task.get("created_at"))).date()
+    for completion_time in completion_times:
+        completion_date = datetime.fromisoformat(completion_time).date()
         completion_dates[completion_date] = completion_dates.get(completion_date, 0) + 1
     
     # Create a pandas dataframe
@@ -52,13 +61,21 @@ def task_completion_by_category(tasks, categories):
     if not tasks or not categories:
         return None
     
+    # Reduce the inputs to hashable rows so the figure is only rebuilt when they change
+    return _task_completion_by_category_figure(
+        tuple((task.get("category_id"), bool(task.get("completed", False))) for task in tasks),
+        tuple((c["id"], c["name"]) for c in categories)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _task_completion_by_category_figure(task_rows, category_rows):
+    """Build the task completion by category chart from (category_id, completed) rows"""
     # Create a map of category_id to name
-    category_map = {c["id"]: c["name"] for c in categories}
+    category_map = dict(category_rows)
     
     # Group tasks by category
     category_stats = {}
-    for task in tasks:
-        category_id = task.get("category_id")
+    for category_id, completed in task_rows:
         if not category_id or category_id not in category_map:
             continue
             
@@ -68,7 +85,7 @@ def task_completion_by_category(tasks, categories):
             category_stats[category_name] = {"completed": 0, "total": 0}
         
         category_stats[category_name]["total"] += 1
-        if task.get("completed", False):
+        if completed:
             category_stats[category_name]["completed"] += 1
     
     # Create a pandas dataframe
@@ -103,22 +120,23 @@ def priority_matrix_chart(tasks):
     if not tasks:
         return None
     
-    # Filter for incomplete tasks
-    incomplete_tasks = [task for task in tasks if not task.get("completed", False)]
+    # Filter for incomplete tasks, keeping only the fields the chart uses so the figure can be cached
+    incomplete_rows = tuple(
+        (task["title"], task.get("importance", 3), task.get("urgency", 3), task["id"])
+        for task in tasks
+        if not task.get("completed", False)
+    )
     
-    if not incomplete_tasks:
+    if not incomplete_rows:
         return None
     
+    return _priority_matrix_figure(incomplete_rows)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _priority_matrix_figure(task_rows):
+    """Build the priority matrix chart from (title, importance, urgency, id) rows"""
     # Create a pandas dataframe
-    df = pd.DataFrame([
-        {
-            "title": task["title"],
-            "importance": task.get("importance", 3),
-            "urgency": task.get("urgency", 3),
-            "id": task["id"]
-        }
-        for task in incomplete_tasks
-    ])
+    df = pd.DataFrame(task_rows, columns=["title", "importance", "urgency", "id"])
     
     # Create a scatter plot
     fig = px.scatter(
@@ -155,15 +173,17 @@ def habit_streak_chart(habits):
     if not habits:
         return None
     
-    # Create a pandas dataframe
-    df = pd.DataFrame([
-        {
-            "habit": habit["title"],
-            "current_streak": habit.get("current_streak", 0),
-            "best_streak": habit.get("best_streak", 0)
-        }
+    # Reduce the habits to hashable rows so the figure is only rebuilt when they change
+    return _habit_streak_figure(tuple(
+        (habit["title"], habit.get("current_streak", 0), habit.get("best_streak", 0))
         for habit in habits
-    ])
+    ))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _habit_streak_figure(habit_rows):
+    """Build the habit streak chart from (title, current_streak, best_streak) rows"""
+    # Create a pandas dataframe
+    df = pd.DataFrame(habit_rows, columns=["habit", "current_streak", "best_streak"])
     
     if df.empty:
         return None
@@ -192,35 +212,26 @@ def habit_heatmap(habit, start_date=None, end_date=None):
     if not start_date:
         start_date = end_date - timedelta(days=60)  # Show ~2 months by default
     
-    # Parse check-in dates
-    check_in_dates = [datetime.fromisoformat(date_str).date() for date_str in habit["check_ins"]]
-    
-    # Create a date range
+    return _habit_heatmap_figure(habit["title"], tuple(habit["check_ins"]), start_date, end_date)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _habit_heatmap_figure(title, check_ins, start_date, end_date):
+    """Build the check-in heatmap for one habit from its ISO check-in dates"""
+    # Flag each day in the range that has a check-in, comparing whole days in one vectorized pass
     date_range = pd.date_range(start=start_date, end=end_date)
-    
-    # Create a dataframe with all dates in range
-    df = pd.DataFrame(date_range, columns=["date"])
-    df["date"] = df["date"].dt.date
-    
-    # Add a column indicating if habit was checked on each date
-    df["checked"] = df["date"].isin(check_in_dates)
-    df["checked_numeric"] = df["checked"].astype(int)
-    
-    # Add columns for week and weekday
-    df["weekday"] = df["date"].apply(lambda d: d.strftime("%a"))
-    df["week"] = df["date"].apply(lambda d: d.isocalendar()[1])
+    checked = date_range.isin(pd.to_datetime(pd.Series(check_ins), format="ISO8601").dt.normalize())
     
     # Create the heatmap
     fig = go.Figure(data=go.Heatmap(
-        z=df["checked_numeric"],
-        x=df["date"],
-        y=df["weekday"],
+        z=checked.astype(int),
+        x=date_range.date,
+        y=date_range.strftime("%a"),
         colorscale=[[0, 'lightgray'], [1, 'green']],
         showscale=False
     ))
     
     fig.update_layout(
-        title=f"Habit Tracking: {habit['title']}",
+        title=f"Habit Tracking: {title}",
         xaxis_title="Date",
         yaxis_title="Day of Week",
         height=300
@@ -233,15 +244,24 @@ def goal_progress_chart(goals):
     if not goals:
         return None
     
+    # Reduce the incomplete goals to hashable rows so the figure is only rebuilt when they change
+    return _goal_progress_figure(tuple(
+        (goal["title"], goal.get("progress", 0))
+        for goal in goals
+        if not goal.get("completed", False)  # Only include incomplete goals
+    ))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _goal_progress_figure(goal_rows):
+    """Build the goal progress chart from (title, progress) rows"""
     # Create a pandas dataframe
     df = pd.DataFrame([
         {
-            "goal": goal["title"],
-            "progress": goal.get("progress", 0),
-            "remaining": 100 - goal.get("progress", 0)
+            "goal": title,
+            "progress": progress,
+            "remaining": 100 - progress
         }
-        for goal in goals
-        if not goal.get("completed", False)  # Only include incomplete goals
+        for title, progress in goal_rows
     ])
     
     if df.empty:
@@ -269,13 +289,21 @@ def time_distribution_chart(calendar_events, categories):
     if not calendar_events or not categories:
         return None
     
+    # Reduce the inputs to hashable rows so the figure is only rebuilt when they change
+    return _time_distribution_figure(
+        tuple((event.get("category_id"), event.get("start_time"), event.get("end_time")) for event in calendar_events),
+        tuple((c["id"], c["name"], c["color"]) for c in categories)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _time_distribution_figure(event_rows, category_rows):
+    """Build the time distribution chart from (category_id, start_time, end_time) rows"""
     # Create a map of category_id to name and color
-    category_map = {c["id"]: {"name": c["name"], "color": c["color"]} for c in categories}
+    category_map = {category_id: {"name": name, "color": color} for category_id, name, color in category_rows}
     
     # Group events by category
     category_durations = {}
-    for event in calendar_events:
-        category_id = event.get("category_id")
+    for category_id, start, end in event_rows:
         if not category_id or category_id not in category_map:
             continue
             
@@ -283,10 +311,10 @@ def time_distribution_chart(calendar_events, categories):
         
         # Calculate event duration in hours
         try:
-            start_time = datetime.fromisoformat(event["start_time"])
-            end_time = datetime.fromisoformat(event["end_time"])
+            start_time = datetime.fromisoformat(start)
+            end_time = datetime.fromisoformat(end)
             duration = (end_time - start_time).total_seconds() / 3600  # Convert to hours
-        except (ValueError, TypeError, KeyError):
+        except (ValueError, TypeError):
             continue
         
         if category_name not in category_durations:
@@ -328,20 +356,25 @@ def productivity_by_hour_chart(tasks):
     if not tasks:
         return None
     
-    # Filter for completed tasks with completion timestamp
-    completed_tasks = [
-        task for task in tasks 
+    # Filter for completed tasks with completion timestamp, keeping only the timestamp so the figure can be cached
+    completion_times = tuple(
+        task["completed_at"] for task in tasks 
         if task.get("completed", False) and "completed_at" in task
-    ]
+    )
     
-    if not completed_tasks:
+    if not completion_times:
         return None
     
+    return _productivity_by_hour_figure(completion_times)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _productivity_by_hour_figure(completion_times):
+    """Build the task completion by hour chart from the ISO completion timestamps"""
     # Group by hour of completion
     hour_counts = {}
-    for task in completed_tasks:
+    for completed_at in completion_times:
         try:
-            completion_time = datetime.fromisoformat(task["completed_at"])
+            completion_time = datetime.fromisoformat(completed_at)
             hour = completion_time.hour
             
             if hour not in hour_counts: